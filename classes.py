@@ -1,267 +1,481 @@
-import json, time
-from typing import Literal
-
-EMOJIS = Literal[
-    '❤️','👍','🤣','🔥','💯','😍','🎉','⚡',
-    '🤩','🤘','😎','🙄','😐','😁','🤪','😉',
-    '🤤','😇','😘','🥰','🥳','🌚','🌝','😴',
-    '🫠','🤔','🫡','😳','🥱','🐈','🐶','💪',
-    '🤞','👋','👏','🤝','👌','🙏','💋','👑',
-    '⭐','🍷','🍑','🤷‍♀️','🤷‍♂️','👩‍❤️‍👨','🦄','👻',
-    '🗿','👀','👁️','🖤','❤️‍🩹','🛑','⛄','❓',
-    '❗️'
-]
-
-# region Name
-class Name:
-    def __init__(self, name, firstName, lastName, type):
-        """
-        Represents a name structure for a contact.
-
-        This class stores name-related information for a contact, including a full name,
-        first name, last name, and type.
-        """
-        self.name = name
-        self.first_name = firstName
-        self.last_name = lastName
-        self.type = type
-
-# region Contact
-class Contact:
-    def __init__(self, client, accountStatus = None, baseUrl = None, names = None, phone = None, description = None, options = None, photoId = None, updateTime = None, id = None, baseRawUrl = None, gender = None, link = None):
-        """
-        Represents a contact with detailed profile information.
-
-        This class encapsulates contact details, including status, URLs, names (as `Name` objects),
-        phone number, description, and other metadata.
-        """
-        self._client = client
-        self.accountStatus = accountStatus
-        self.base_url = baseUrl
-        self.names = [Name(**n) for n in names]
-        self.phone = phone
-        self.description = description
-        self.options = options
-        self.photo_id = photoId
-        self.update_time = updateTime
-        self.id = id
-        self.link = link
-        self.gender = gender
-        self.base_raw_url = baseRawUrl
-    
-    # region add()
-    def add(self):
-        return self._client.contact_add(self.id)
-    
-    # region remove()
-    def remove(self):
-        return self._client.contact_remove(self.id)
-    
-    # region block()
-    def block(self):
-        return self._client.contact_block(self.id)
-    
-    # region unblock()
-    def unblock(self):
-        return self._client.contact_unblock(self.id)
-
-# region User
-class User:
-    def __init__(self, client, profile, _f=0):
-        """
-        Represents a user with a contact profile.
-
-        This class wraps a `Contact` object created from a profile dictionary, typically
-        received from the server.
-        """
-        self._client = client
-        self.contact = Contact(client, **profile)
-        _id = client.me.contact.id if client.me else profile["id"]
-        if not _f:
-            self.chat = Chat(self._client, profile["id"] ^ _id)
-
-        if profile["id"] != _id:
-
-            pass
-
-# region Chat
-class Chat:
-    def __init__(self, client, chat_id):
-        """
-        Represents a chat in the messaging system.
-
-        This class associates a chat with a client instance and its unique ID.
-        """
-        if chat_id == 0:
-            return
-        self._client = client
-
-        self.id: int = chat_id
-        self.link = f"https://web.max.ru/{chat_id}"
-
-        seq = client.seq
-        client.websocket.send(json.dumps({"ver":11,"cmd":0,"seq":seq,"opcode":49,"payload":{"chatId":chat_id,"from":int(time.time()*1000),"forward":0,"backward":30,"getMessages":True}}))
-        while True:
-            r = client.websocket.recv()
-            recv = json.loads(r)
-            if recv["seq"] == seq and recv["opcode"] == 49:
-                break
-            else:
-                pass
-        
-        payload = recv["payload"]
-        if not recv["opcode"] in [150]:
-            _ = []
-            for msg in payload["messages"]:
-                m = Message(client, 0, **msg, _f=1)
-                _.append(m)
-            self.messages: list[Message] = _
-
-    # region pin()
-    def pin(self):
-        self._client.pin_chat(self.id)
-
-    # region unpin()
-    def unpin(self):
-        self._client.unpin_chat(self.id)
-
-    def clear_history(self): # TODO
-        # seq = self.seq
-        # {"ver":11,"cmd":0,"seq":seq,"opcode":48,"payload":{"chatIds":[chatid]}}
-        pass
-
-# region Message
-class Message:
-    def __init__(self, client, chatId: str, sender: str, id, time, text, type, _f=0, **kwargs):
-        """
-        Represents a message in a chat.
-
-        This class encapsulates message details, including the sender, content, and metadata,
-        and provides methods to interact with the message (e.g., reply, delete, edit).
-        """
-        self._client = client
-
-        if not _f:
-            self.chat = Chat(client, chatId)
-        self.sender = sender
-        self.id = id
-        self.time = time
-        self.text = text
-        self.type = type
-        self.update_time = kwargs.get("updateTime")
-        self.options = kwargs.get("options")
-        self.cid = kwargs.get("cid")
-        self.attaches = kwargs.get("attaches", [])
-        self.reaction_info = kwargs.get("reactionInfo", {})
-        self.user: User = client.get_user(id=sender, _f=1)
-    
-    # region reply()
-    def reply(self, text: str, **kwargs) -> "Message":
-        """
-        Replies to the current message in its chat.
-
-        This method sends a new message in the same chat, linking it as a reply to the current message.
-
-        Args:
-            text (str): The text content of the reply.
-            **kwargs: Additional arguments to pass to `send_message` (e.g., notify).
-
-        Returns:
-            Message: A `Message` object representing the sent reply.
-
-        Usage:
-            ```python
-            reply_msg = message.reply("Thanks for your message!")
-            ```
-        """
-        return self._client.send_message(self.chat.id, text, self.id, **kwargs)
-    
-    # region answer()
-    def answer(self, text: str, **kwargs) -> "Message":
-        """
-        Sends a new message in the same chat without linking it as a reply.
-
-        This method sends a message to the same chat as the current message, without referencing it.
-
-        Args:
-            text (str): The text content of the message.
-            **kwargs: Additional arguments to pass to `send_message` (e.g., notify).
-
-        Returns:
-            Message: A `Message` object representing the sent message.
-
-        Usage:
-            ```python
-            new_msg = message.answer("Got it, sending a follow-up.")
-            ```
-        """
-        return self._client.send_message(self.chat.id, text, **kwargs)
-
-    # region delete()
-    def delete(self, for_me = False):
-        """
-        Deletes the current message from its chat.
-
-        This method deletes the message, either for the current user only or for all chat participants.
-
-        Args:
-            for_me (bool, optional): If True, deletes the message only for the current user. Defaults to False.
-
-        Usage:
-            ```python
-            # Delete message for all
-            message.delete()
-            
-            # Delete message only for the current user
-            message.delete(for_me=True)
-            ```
-        """
-        return self._client.delete_message(self.chat.id, [self.id], for_me)
-    
-    # region edit()
-    def edit(self, text: str) -> "Message":
-        """
-        Edits the text content of the current message.
-
-        This method updates the message's text and returns the updated `Message` object.
-
-        Args:
-            text (str): The new text content for the message.
-
-        Returns:
-            Message: A `Message` object representing the edited message.
-
-        Usage:
-            ```python
-            updated_msg = message.edit("Updated message text!")
-            print(updated_msg.text)  # Output: Updated message text!
-            ```
-        """
-        return self._client.edit_message(self.chat.id, self.id, text)
-    
-    # region react()
-    def react(self, reaction: EMOJIS) -> "Reactions":
-        """
-        Reacts to the current message with a specified emoji.
-
-        Args:
-            reaction (EMOJIS): The emoji reaction to be added, represented by an EMOJIS enum.
-
-        Returns:
-            Reactions: An object containing updated reaction information for the message.
-        """
-        return self._client.set_reaction(self.chat.id, self.id, reaction)
-
-# region Reaction
-class Reaction:
-    def __init__(self, reaction: str, count: int):
-        self.reaction = reaction
-        self.count = count
-
-# region Reactions
-class Reactions:
-    def __init__(self, **kwargs):
-        reaction_info = kwargs.get('reactionInfo', {})
-        self.counters = [Reaction(**c) for c in reaction_info.get('counters', [])]
-        self.your_reaction = reaction_info.get('yourReaction')
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from types import MappingProxyType
+from time import time_ns as _time_ns
+from typing import Literal
+
+# Prebuilt opcode-49 history request; only seq/chatId/from change per call,
+# so interpolating them directly skips a dict build and a full json.dumps.
+_HIST_TPL = '{{"ver":11,"cmd":0,"seq":{seq},"opcode":49,"payload":{{"chatId":{cid},"from":{ts},"forward":0,"backward":30,"getMessages":true}}}}'
+
+# One source of truth for the supported reactions: the plain tuple feeds the
+# runtime structures directly, and the Literal annotation is derived from it
+# (PEP 586 accepts a tuple subscript), so nothing needs typing.get_args.
+_EMOJI_TUPLE = (
+    '❤️','👍','🤣','🔥','💯','😍','🎉','⚡',
+    '🤩','🤘','😎','🙄','😐','😁','🤪','😉',
+    '🤤','😇','😘','🥰','🥳','🌚','🌝','😴',
+    '🫠','🤔','🫡','😳','🥱','🐈','🐶','💪',
+    '🤞','👋','👏','🤝','👌','🙏','💋','👑',
+    '⭐','🍷','🍑','🤷‍♀️','🤷‍♂️','👩‍❤️‍👨','🦄','👻',
+    '🗿','👀','👁️','🖤','❤️‍🩹','🛑','⛄','❓',
+    '❗️'
+)
+_EMOJI_SET = frozenset(_EMOJI_TUPLE)
+EMOJIS = Literal[_EMOJI_TUPLE]
+
+# The emoji alphabet is bounded, so reuse one interned str per emoji instead
+# of allocating a fresh one for every Reaction counter parsed.
+_EMOJI_INTERN = {e: sys.intern(e) for e in _EMOJI_TUPLE}
+_VALID_REACTIONS = _EMOJI_SET
+
+# Shared read-only empty mapping so messages without reactions don't
+# allocate per parse; the proxy cannot be mutated, so sharing is safe.
+_EMPTY_DICT = MappingProxyType({})
+
+# region Name
+class Name:
+    __slots__ = ("name", "first_name", "last_name", "type")
+
+    def __init__(self, name, firstName, lastName, type):
+        """
+        Represents a name structure for a contact.
+
+        This class stores name-related information for a contact, including a full name,
+        first name, last name, and type.
+        """
+        self.name = name
+        self.first_name = firstName
+        self.last_name = lastName
+        self.type = type
+
+# region Contact
+# Server key -> attribute layout for Contact; the constructor is generated
+# from this spec below so it compiles to plain positional stores with no
+# **kwargs dict.
+_CONTACT_FIELDS = (
+    ("accountStatus", "accountStatus"),
+    ("baseUrl", "base_url"),
+    ("names", "names"),
+    ("phone", "phone"),
+    ("description", "description"),
+    ("options", "options"),
+    ("photoId", "photo_id"),
+    ("updateTime", "update_time"),
+    ("id", "id"),
+    ("baseRawUrl", "base_raw_url"),
+    ("gender", "gender"),
+    ("link", "link"),
+)
+
+class Contact:
+    """
+    Represents a contact with detailed profile information.
+
+    This class encapsulates contact details, including status, URLs, names (as `Name` objects),
+    phone number, description, and other metadata. `__init__` is generated from
+    `_CONTACT_FIELDS` at import time.
+    """
+
+    __slots__ = (
+        "_client", "accountStatus", "base_url", "names", "phone", "description",
+        "options", "photo_id", "update_time", "id", "link", "gender", "base_raw_url",
+    )
+
+    # region add()
+    def add(self):
+        return self._client.contact_add(self.id)
+    
+    # region remove()
+    def remove(self):
+        return self._client.contact_remove(self.id)
+    
+    # region block()
+    def block(self):
+        return self._client.contact_block(self.id)
+    
+    # region unblock()
+    def unblock(self):
+        return self._client.contact_unblock(self.id)
+
+# region _make_contact_init()
+def _make_contact_init():
+    """Generates a specialized Contact.__init__ from _CONTACT_FIELDS."""
+    args = ", ".join(f"{param}=None" for param, _ in _CONTACT_FIELDS)
+    lines = [f"def __init__(self, client, {args}):"]
+    lines.append("    self._client = client")
+    for param, attr in _CONTACT_FIELDS:
+        if param == "names":
+            lines.append('    self.names = [Name(n["name"], n["firstName"], n["lastName"], n["type"]) for n in names]')
+        else:
+            lines.append(f"    self.{attr} = {param}")
+    ns = {"Name": Name}
+    exec("\n".join(lines), ns)
+    return ns["__init__"]
+
+Contact.__init__ = _make_contact_init()
+
+# region User
+class User:
+    __slots__ = ("_client", "contact", "_profile_id", "_me_id", "_chat")
+
+    def __init__(self, client, profile, _f=0):
+        """
+        Represents a user with a contact profile.
+
+        This class wraps a `Contact` object created from a profile dictionary, typically
+        received from the server. The dialog chat with the user is built lazily on
+        first access to `chat`, so users created only to annotate messages never
+        trigger a history fetch.
+        """
+        self._client = client
+        self.contact = Contact(client, **profile)
+        self._profile_id = profile["id"]
+        self._me_id = client.me.contact.id if client.me else profile["id"]
+        self._chat = None
+
+    # region chat
+    @property
+    def chat(self) -> "Chat":
+        if self._chat is None:
+            self._chat = Chat(self._client, self._profile_id ^ self._me_id)
+        return self._chat
+
+# region Chat
+class Chat:
+    __slots__ = ("_client", "id", "link", "_messages", "_ids", "_times", "_senders", "_by_id")
+
+    def __new__(cls, client, chat_id):
+        if client is not None and chat_id:
+            cached = client._chat_cache.get(chat_id)
+            if cached is not None:
+                return cached
+        return super().__new__(cls)
+
+    def __init__(self, client, chat_id):
+        """
+        Represents a chat in the messaging system.
+
+        This class associates a chat with a client instance and its unique ID.
+        Instances are cached per client, so constructing the same chat twice
+        returns the same object. Message history is fetched lazily on first
+        access to `messages`.
+        """
+        if chat_id == 0:
+            return
+        if getattr(self, "id", None) == chat_id:
+            return
+        self._client = client
+
+        self.id: int = chat_id
+        self.link = f"https://web.max.ru/{chat_id}"
+        self._messages = None
+        self._ids = self._times = self._senders = self._by_id = None
+        client._chat_cache[chat_id] = self
+
+    # region messages
+    @property
+    def messages(self) -> list["Message"]:
+        if self._messages is None:
+            msgs = self._fetch_history()
+            self._messages = msgs
+            # Column views over the history: bulk reads (all ids, all
+            # timestamps, all senders) touch one contiguous tuple instead of
+            # walking every Message object.
+            self._ids = tuple(m.id for m in msgs)
+            self._times = tuple(m.time for m in msgs)
+            self._senders = tuple(m.sender for m in msgs)
+            self._by_id = {m.id: m for m in msgs}
+        return self._messages
+
+    # region find_by_id()
+    def find_by_id(self, message_id) -> "Message":
+        """
+        Looks up a history message by its ID.
+
+        Uses the prebuilt id index, so the lookup is O(1) instead of a scan
+        over `messages`.
+        """
+        self.messages
+        return self._by_id.get(message_id)
+
+    # region refresh()
+    def refresh(self) -> list["Message"]:
+        """
+        Drops the cached history and refetches it.
+
+        The caches (message list, column views, id index) are invalidated
+        first and only then the old Message objects go back to the pool, so
+        nothing reachable through the chat ever points at a released
+        instance. Long-lived chats that refresh repeatedly reuse instances
+        instead of reallocating the whole history.
+        """
+        msgs = self._messages
+        self._messages = None
+        self._ids = self._times = self._senders = self._by_id = None
+        if msgs:
+            for m in msgs:
+                m.release()
+        return self.messages
+
+    # region _fetch_history()
+    def _fetch_history(self) -> list["Message"]:
+        """Internal history fetch. Don't touch."""
+        client = self._client
+        seq = client._register()
+        client._send_raw(_HIST_TPL.format(seq=seq, cid=self.id, ts=_time_ns() // 1_000_000))
+        recv = client._await(seq)
+
+        payload = recv["payload"]
+        if recv["opcode"] in [150]:
+            return []
+        raw = payload["messages"]
+        senders = {msg["sender"] for msg in raw}
+        try:
+            users = {u.contact.id: u for u in client.get_users(list(senders), _f=1)}
+        except Exception:
+            client_t = client._t
+            # Same condition as _await's event-wait path: a listener must be
+            # reading the socket AND not be this thread — when a handler on
+            # the listener thread lands here, workers waiting on events would
+            # deadlock against the blocked listener.
+            if client._loop is not None or (
+                    client_t and client_t.is_alive()
+                    and client_t is not threading.current_thread()):
+                # Batched lookup failed; with a listener owning the socket the
+                # waiters just block on events, so overlap the per-user
+                # round-trips instead of paying them sequentially.
+                with ThreadPoolExecutor(max_workers=8) as ex:
+                    futs = {s: ex.submit(client.get_user, id=s, _f=1) for s in senders}
+                    users = {s: f.result() for s, f in futs.items()}
+            else:
+                # No listener: _await reads the socket inline, and concurrent
+                # reads are rejected by the sync websocket client.
+                users = {s: client.get_user(id=s, _f=1) for s in senders}
+        return _build_messages(client, raw, users, self)
+
+    # region pin()
+    def pin(self):
+        self._client.pin_chat(self.id)
+
+    # region unpin()
+    def unpin(self):
+        self._client.unpin_chat(self.id)
+
+    def clear_history(self): # TODO
+        # seq = self.seq
+        # {"ver":11,"cmd":0,"seq":seq,"opcode":48,"payload":{"chatIds":[chatid]}}
+        pass
+
+# region Message
+class Message:
+    __slots__ = (
+        "_client", "chat", "sender", "id", "time", "text", "type",
+        "update_time", "options", "cid", "attaches", "reaction_info", "_user",
+        "_text_fold",
+    )
+
+    _pool: list = []
+
+    # region _new()
+    @classmethod
+    def _new(cls, *args, **kwargs) -> "Message":
+        """Pooled constructor; reuses a released instance when available."""
+        # EAFP pop: the pool is shared between the listener thread and user
+        # threads calling Chat.refresh(), so a truth-test-then-pop can race.
+        try:
+            obj = cls._pool.pop()
+        except IndexError:
+            obj = object.__new__(cls)
+        obj.__init__(*args, **kwargs)
+        return obj
+
+    # region release()
+    def release(self):
+        """Resets the instance and returns it to the pool for reuse."""
+        for slot in Message.__slots__:
+            try:
+                delattr(self, slot)
+            except AttributeError:
+                pass
+        Message._pool.append(self)
+
+    def __init__(self, client, chatId: str, sender: str, id, time, text, type, _f=0, user=None, _chat=None, **kwargs):
+        """
+        Represents a message in a chat.
+
+        This class encapsulates message details, including the sender, content, and metadata,
+        and provides methods to interact with the message (e.g., reply, delete, edit).
+        """
+        self._client = client
+
+        self.chat = _chat if _chat is not None else (Chat(client, chatId) if not _f else None)
+        # Interning string sender ids here gives the user_id filter a
+        # pointer-equality hit on its interned needle.
+        # isinstance, not type(): the `type` parameter shadows the builtin here
+        self.sender = sys.intern(sender) if isinstance(sender, str) else sender
+        self.id = id
+        self.time = time
+        self.text = text
+        self.type = type
+        _g = kwargs.get
+        self.update_time = _g("updateTime")
+        self.options = _g("options")
+        self.cid = _g("cid")
+        # attaches stays a per-instance list (baseline type; callers append)
+        self.attaches = _g("attaches") or []
+        self.reaction_info = _g("reactionInfo") or _EMPTY_DICT
+        self._user = user
+    
+    # region user
+    @property
+    def user(self) -> "User":
+        if self._user is None:
+            self._user = self._client.get_user(id=self.sender, _f=1)
+        return self._user
+
+    # region reply()
+    def reply(self, text: str, **kwargs) -> "Message":
+        """
+        Replies to the current message in its chat.
+
+        This method sends a new message in the same chat, linking it as a reply to the current message.
+
+        Args:
+            text (str): The text content of the reply.
+            **kwargs: Additional arguments to pass to `send_message` (e.g., notify).
+
+        Returns:
+            Message: A `Message` object representing the sent reply.
+
+        Usage:
+            ```python
+            reply_msg = message.reply("Thanks for your message!")
+            ```
+        """
+        return self._client.send_message(self.chat.id, text, self.id, **kwargs)
+    
+    # region answer()
+    def answer(self, text: str, **kwargs) -> "Message":
+        """
+        Sends a new message in the same chat without linking it as a reply.
+
+        This method sends a message to the same chat as the current message, without referencing it.
+
+        Args:
+            text (str): The text content of the message.
+            **kwargs: Additional arguments to pass to `send_message` (e.g., notify).
+
+        Returns:
+            Message: A `Message` object representing the sent message.
+
+        Usage:
+            ```python
+            new_msg = message.answer("Got it, sending a follow-up.")
+            ```
+        """
+        return self._client.send_message(self.chat.id, text, **kwargs)
+
+    # region delete()
+    def delete(self, for_me = False):
+        """
+        Deletes the current message from its chat.
+
+        This method deletes the message, either for the current user only or for all chat participants.
+
+        Args:
+            for_me (bool, optional): If True, deletes the message only for the current user. Defaults to False.
+
+        Usage:
+            ```python
+            # Delete message for all
+            message.delete()
+            
+            # Delete message only for the current user
+            message.delete(for_me=True)
+            ```
+        """
+        return self._client.delete_message(self.chat.id, [self.id], for_me)
+    
+    # region edit()
+    def edit(self, text: str) -> "Message":
+        """
+        Edits the text content of the current message.
+
+        This method updates the message's text and returns the updated `Message` object.
+
+        Args:
+            text (str): The new text content for the message.
+
+        Returns:
+            Message: A `Message` object representing the edited message.
+
+        Usage:
+            ```python
+            updated_msg = message.edit("Updated message text!")
+            print(updated_msg.text)  # Output: Updated message text!
+            ```
+        """
+        return self._client.edit_message(self.chat.id, self.id, text)
+    
+    # region react()
+    def react(self, reaction: EMOJIS) -> "Reactions":
+        """
+        Reacts to the current message with a specified emoji.
+
+        Args:
+            reaction (EMOJIS): The emoji reaction to be added, represented by an EMOJIS enum.
+
+        Returns:
+            Reactions: An object containing updated reaction information for the message.
+
+        Raises:
+            ValueError: If `reaction` is not one of the supported emojis.
+        """
+        if reaction not in _VALID_REACTIONS:
+            raise ValueError(f"unsupported reaction: {reaction}")
+        return self._client.set_reaction(self.chat.id, self.id, reaction)
+
+# region _build_messages()
+def _build_messages(client, raw, users, chat=None) -> list[Message]:
+    """
+    Builds Message objects from raw history entries.
+
+    Extracts the known fields directly instead of unpacking each server dict
+    with **kwargs, and binds the hot lookups to locals — this loop is the
+    main CPU cost of opening a chat.
+    """
+    out = []
+    append = out.append
+    new = Message._new
+    users_get = users.get
+    for d in raw:
+        sender = d["sender"]
+        append(new(
+            client, 0, sender, d["id"], d["time"], d.get("text"), d.get("type"),
+            _f=1, user=users_get(sender), _chat=chat,
+            updateTime=d.get("updateTime"), options=d.get("options"),
+            cid=d.get("cid"), attaches=d.get("attaches", []),
+            reactionInfo=d.get("reactionInfo", {}),
+        ))
+    return out
+
+# region Reaction
+class Reaction:
+    __slots__ = ("reaction", "count")
+
+    def __init__(self, reaction: str, count: int):
+        interned = _EMOJI_INTERN.get(reaction)
+        self.reaction = interned if interned is not None else sys.intern(reaction)
+        self.count = count
+
+# region Reactions
+class Reactions:
+    __slots__ = ("counters", "your_reaction", "total_count")
+
+    def __init__(self, **kwargs):
+        reaction_info = kwargs.get('reactionInfo', {})
+        self.counters = [Reaction(c["reaction"], c["count"]) for c in reaction_info.get('counters', [])]
+        self.your_reaction = reaction_info.get('yourReaction')
         self.total_count = reaction_info.get('totalCount')
\ No newline at end of file
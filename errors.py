@@ -1,11 +1,16 @@
-class BaseException(Exception):
-    def __init__(self, error, title):
-        super().__init__(f"{title} ({error})")
-        self.error = error
-        self.title = title
-
-class VerifyCodeWrong(BaseException):
-    pass
-
-class UserNotFound(BaseException):
-    pass
\ No newline at end of file
+class BaseException(Exception):
+    __slots__ = ("error", "title")
+
+    def __init__(self, error, title):
+        super().__init__(error, title)
+        self.error = error
+        self.title = title
+
+    def __str__(self):
+        return f"{self.title} ({self.error})"
+
+class VerifyCodeWrong(BaseException):
+    pass
+
+class UserNotFound(BaseException):
+    pass
@@ -1,263 +1,710 @@
-class Filter:
-    def __call__(self, client, message) -> bool:
-        """
-        Base class for message filters.
-
-        This class defines the interface for filters that evaluate whether a message meets specific criteria.
-        Subclasses implement the `__call__` method to provide filtering logic. Supports combining filters
-        using logical AND (`&`), OR (`|`), and NOT (`~`) operators.
-
-        Args:
-            client (MaxClient): The client instance handling the message.
-            message (Message): The message to evaluate.
-
-        Returns:
-            bool: True if the message passes the filter, False otherwise.
-
-        Usage:
-            ```python
-            # Subclass Filter to create a custom filter
-            class CustomFilter(Filter):
-                def __call__(self, client, message):
-                    return len(message.text) > 10
-
-            custom_filter = CustomFilter()
-            result = custom_filter(client, message)  # Returns True if message text is longer than 10 characters
-            ```
-        """
-        return True
-
-    def __and__(self, other: 'Filter') -> 'AndFilter':
-        """
-        Combines this filter with another using logical AND.
-
-        Args:
-            other (Filter): The filter to combine with.
-
-        Returns:
-            AndFilter: A new filter that requires both filters to pass.
-
-        Usage:
-            ```python
-            combined_filter = filters.text("hello") & filters.user_id("123456")
-            # Passes if message text is "hello" AND sender is "123456"
-            ```
-        """
-        return AndFilter(self, other)
-
-    def __or__(self, other: 'Filter') -> 'OrFilter':
-        """
-        Combines this filter with another using logical OR.
-
-        Args:
-            other (Filter): The filter to combine with.
-
-        Returns:
-            OrFilter: A new filter that passes if either filter passes.
-
-        Usage:
-            ```python
-            combined_filter = filters.text("hello") | filters.text("world")
-            # Passes if message text is "hello" OR "world"
-            ```
-        """
-        return OrFilter(self, other)
-
-    def __invert__(self) -> 'NotFilter':
-        """
-        Negates this filter using logical NOT.
-
-        Returns:
-            NotFilter: A new filter that passes if this filter fails.
-
-        Usage:
-            ```python
-            not_me_filter = ~filters.me
-            # Passes if the message sender is NOT the authenticated user
-            ```
-        """
-        return NotFilter(self)
-
-class AndFilter(Filter):
-    def __init__(self, *filters: Filter):
-        self.filters = filters
-
-    def __call__(self, client, message) -> bool:
-        return all(f(client, message) for f in self.filters)
-
-class OrFilter(Filter):
-    def __init__(self, *filters: Filter):
-        self.filters = filters
-
-    def __call__(self, client, message) -> bool:
-        return any(f(client, message) for f in self.filters)
-
-class NotFilter(Filter):
-    def __init__(self, filter: Filter):
-        self.filter = filter
-
-    def __call__(self, client, message) -> bool:
-        return not self.filter(client, message)
-
-class text(Filter):
-    def __init__(self, text: str):
-        """
-        A filter that matches messages with exact text (case-insensitive).
-
-        Args:
-            text (str): The text to match against the message's text.
-
-        Attributes:
-            text (str): The lowercase text to match.
-        """
-        self.text = text.lower()
-
-    def __call__(self, client, message) -> bool:
-        """
-        Checks if the message text matches the specified text.
-
-        Args:
-            client (MaxClient): The client instance handling the message.
-            message (Message): The message to evaluate.
-
-        Returns:
-            bool: True if the message text matches (case-insensitive), False otherwise.
-        """
-        return message.text.lower() == self.text if message.text else False
-
-class command(Filter):
-    def __init__(self, command: str, prefix: str = "/"):
-        """
-        A filter that matches messages starting with a specific command (case-insensitive).
-
-        Args:
-            command (str): The command to match (without prefix).
-            prefix (str, optional): The command prefix (e.g., "/"). Defaults to "/".
-
-        Attributes:
-            command (str): The full command string (prefix + command, lowercase).
-        """
-        self.command = (prefix + command).lower()
-
-    def __call__(self, client, message) -> bool:
-        """
-        Checks if the message text starts with the specified command.
-
-        Args:
-            client (MaxClient): The client instance handling the message.
-            message (Message): The message to evaluate.
-
-        Returns:
-            bool: True if the message text starts with the command (case-insensitive), False otherwise.
-        """
-        return message.text.lower().startswith(self.command) if message.text else False
-
-class user_id(Filter):
-    def __init__(self, user_id: str):
-        """
-        A filter that matches messages from a specific user ID.
-
-        Args:
-            user_id (str): The user ID to match against the message's sender.
-
-        Attributes:
-            user_id (str): The user ID to match.
-        """
-        self.user_id = user_id
-
-    def __call__(self, client, message) -> bool:
-        """
-        Checks if the message sender matches the specified user ID.
-
-        Args:
-            client (MaxClient): The client instance handling the message.
-            message (Message): The message to evaluate.
-
-        Returns:
-            bool: True if the message sender matches the user ID, False otherwise.
-        """
-        return message.sender == self.user_id
-
-class me(Filter):
-    def __init__(self):
-        """
-        A filter that matches messages sent by the authenticated user.
-
-        This filter checks if the message sender matches the ID of the authenticated user (`client.me.contact.id`).
-        """
-        pass
-
-    def __call__(self, client, message) -> bool:
-        """
-        Checks if the message sender is the authenticated user.
-
-        Args:
-            client (MaxClient): The client instance handling the message.
-            message (Message): The message to evaluate.
-
-        Returns:
-            bool: True if the message sender is the authenticated user, False otherwise.
-
-        Raises:
-            ValueError: If the client has no authenticated user (client.me is None).
-        """
-        if not client.me or not client.me.contact.id:
-            raise ValueError("No authenticated user found. Please authenticate first.")
-        return message.sender == client.me.contact.id
-
-class _any(Filter):
-    def __init__(self):
-        """
-        A filter that passes all messages.
-
-        This filter always returns True, allowing any message to pass.
-        """
-        pass
-
-    def __call__(self, client, message) -> bool:
-        """
-        Always passes the message.
-
-        Args:
-            client (MaxClient): The client instance handling the message.
-            message (Message): The message to evaluate.
-
-        Returns:
-            bool: Always True.
-        """
-        return True
-    
-class user(Filter):
-    def __init__(self):
-        """
-        A filter that matches messages sent by the user.
-
-        This filter checks if the message sender is user.
-        """
-        pass
-
-    def __call__(self, client, message) -> bool:
-        """
-        Checks if the message sender is the authenticated user.
-
-        Args:
-            client (MaxClient): The client instance handling the message.
-            message (Message): The message to evaluate.
-
-        Returns:
-            bool: True if the message sender is the authenticated user, False otherwise.
-
-        Raises:
-            ValueError: If the client has no authenticated user (client.me is None).
-        """
-        if not client.me or not client.me.contact.id:
-            raise ValueError("No authenticated user found. Please authenticate first.")
-        return message.type == "USER"
-
-class filters:
-    text = text
-    command = command
-    user_id = user_id
-    me = me
-    user = user
-    any = _any
\ No newline at end of file
+import re
+import sys
+from weakref import WeakValueDictionary
+
+class Filter:
+    __slots__ = ("__weakref__",)
+
+    def __call__(self, client, message) -> bool:
+        """
+        Base class for message filters.
+
+        This class defines the interface for filters that evaluate whether a message meets specific criteria.
+        Subclasses implement the `__call__` method to provide filtering logic. Supports combining filters
+        using logical AND (`&`), OR (`|`), and NOT (`~`) operators.
+
+        Args:
+            client (MaxClient): The client instance handling the message.
+            message (Message): The message to evaluate.
+
+        Returns:
+            bool: True if the message passes the filter, False otherwise.
+
+        Usage:
+            ```python
+            # Subclass Filter to create a custom filter
+            class CustomFilter(Filter):
+                def __call__(self, client, message):
+                    return len(message.text) > 10
+
+            custom_filter = CustomFilter()
+            result = custom_filter(client, message)  # Returns True if message text is longer than 10 characters
+            ```
+        """
+        return True
+
+    # Static hints used to order composite children: cheap, highly selective
+    # predicates run first so short-circuiting skips the expensive ones.
+    _cost = 5
+    _selectivity = 0.5
+
+    def __and__(self, other: 'Filter') -> 'AndFilter':
+        """
+        Combines this filter with another using logical AND.
+
+        Args:
+            other (Filter): The filter to combine with.
+
+        Returns:
+            AndFilter: A new filter that requires both filters to pass.
+
+        Usage:
+            ```python
+            combined_filter = filters.text("hello") & filters.user_id("123456")
+            # Passes if message text is "hello" AND sender is "123456"
+            ```
+        """
+        # Fold the constant sentinels here too — the operators are how users
+        # actually build composites, and a collapsed result skips the wrapped
+        # filter call entirely at dispatch time.
+        if other is _ANY_FILTER or isinstance(other, _any):
+            return self
+        if self is _ANY_FILTER or isinstance(self, _any):
+            return other
+        if (self is _NEVER_FILTER or isinstance(self, _never)
+                or other is _NEVER_FILTER or isinstance(other, _never)):
+            return _NEVER_FILTER
+        if isinstance(self, (AndFilter, _And2)) or isinstance(other, (AndFilter, _And2)):
+            return AndFilter(self, other)
+        return _And2(self, other)
+
+    def __or__(self, other: 'Filter') -> 'OrFilter':
+        """
+        Combines this filter with another using logical OR.
+
+        Args:
+            other (Filter): The filter to combine with.
+
+        Returns:
+            OrFilter: A new filter that passes if either filter passes.
+
+        Usage:
+            ```python
+            combined_filter = filters.text("hello") | filters.text("world")
+            # Passes if message text is "hello" OR "world"
+            ```
+        """
+        if (self is _ANY_FILTER or isinstance(self, _any)
+                or other is _ANY_FILTER or isinstance(other, _any)):
+            return _ANY_FILTER
+        if other is _NEVER_FILTER or isinstance(other, _never):
+            return self
+        if self is _NEVER_FILTER or isinstance(self, _never):
+            return other
+        if isinstance(self, (OrFilter, _Or2)) or isinstance(other, (OrFilter, _Or2)):
+            return OrFilter(self, other)
+        return _Or2(self, other)
+
+    def __invert__(self) -> 'NotFilter':
+        """
+        Negates this filter using logical NOT.
+
+        Returns:
+            NotFilter: A new filter that passes if this filter fails.
+
+        Usage:
+            ```python
+            not_me_filter = ~filters.me
+            # Passes if the message sender is NOT the authenticated user
+            ```
+        """
+        if isinstance(self, _any):
+            return _NEVER_FILTER
+        if isinstance(self, _never):
+            return _ANY_FILTER
+        return NotFilter(self)
+
+# region _flatten_and()
+def _flatten_and(filters):
+    """
+    Splices nested AND children into one flat list and folds constants:
+    `_any` children are no-ops and are dropped, and a `_never` child makes
+    the whole conjunction constant-False (collapsed to that single child).
+    """
+    flat = []
+    for f in filters:
+        if isinstance(f, AndFilter):
+            flat.extend(f.filters)
+        elif isinstance(f, _And2):
+            flat.append(f.a)
+            flat.append(f.b)
+        elif f is _ANY_FILTER or isinstance(f, _any):
+            continue
+        else:
+            flat.append(f)
+    for f in flat:
+        if f is _NEVER_FILTER or isinstance(f, _never):
+            return [f]
+    return flat
+
+# region _flatten_or()
+def _flatten_or(filters):
+    """
+    Splices nested OR children into one flat list and folds constants:
+    `_never` children can never fire a branch and are dropped, and an `_any`
+    child makes the whole disjunction constant-True (collapsed to it).
+    """
+    flat = []
+    for f in filters:
+        if isinstance(f, OrFilter):
+            flat.extend(f.filters)
+        elif isinstance(f, _Or2):
+            flat.append(f.a)
+            flat.append(f.b)
+        else:
+            flat.append(f)
+    for f in flat:
+        if f is _ANY_FILTER or isinstance(f, _any):
+            return [f]
+    return [f for f in flat if not isinstance(f, _never)]
+
+class AndFilter(Filter):
+    __slots__ = ("filters", "_call")
+
+    _cost = 10
+
+    def __new__(cls, *filters: Filter):
+        # Constant conjunctions are replaced by the shared sentinels, so the
+        # dispatcher can recognize them with one identity check. Callers must
+        # use the returned object, which may not be an AndFilter.
+        flat = _flatten_and(filters)
+        if not flat:
+            return _ANY_FILTER
+        if len(flat) == 1 and isinstance(flat[0], _never):
+            return _NEVER_FILTER
+        return super().__new__(cls)
+
+    def __init__(self, *filters: Filter):
+        flat = _flatten_and(filters)
+        # Identical exact-text children are redundant under AND; keep one.
+        seen_texts = set()
+        deduped = []
+        for f in flat:
+            if isinstance(f, _TextImpl):
+                if f.text in seen_texts:
+                    continue
+                seen_texts.add(f.text)
+            deduped.append(f)
+        flat = deduped
+        flat.sort(key=lambda f: getattr(f, '_selectivity', 0.5) * getattr(f, '_cost', 5))
+        self.filters = tuple(flat)
+        # The chain is immutable after construction, so bind it into the
+        # evaluation closure: the default arg makes the children LOAD_FASTs
+        # instead of attribute loads per dispatch. The common 2- and 3-child
+        # shapes get an inlined short-circuit chain with no iteration at all.
+        n = len(self.filters)
+        if n == 2:
+            a, b = self.filters
+            self._call = lambda client, message, a=a, b=b: a(client, message) and b(client, message)
+        elif n == 3:
+            a, b, d = self.filters
+            self._call = lambda client, message, a=a, b=b, d=d: a(client, message) and b(client, message) and d(client, message)
+        else:
+            def _call(client, message, _fs=self.filters):
+                for f in _fs:
+                    if not f(client, message):
+                        return False
+                return True
+            self._call = _call
+
+    def __call__(self, client, message) -> bool:
+        return self._call(client, message)
+
+class OrFilter(Filter):
+    __slots__ = ("filters", "_call")
+
+    _cost = 10
+
+    def __new__(cls, *filters: Filter):
+        flat = _flatten_or(filters)
+        if not flat:
+            return _NEVER_FILTER
+        if len(flat) == 1 and isinstance(flat[0], _any):
+            return _ANY_FILTER
+        return super().__new__(cls)
+
+    def __init__(self, *filters: Filter):
+        flat = _flatten_or(filters)
+        # Fuse homogeneous sibling groups: N user_id branches become one set
+        # membership test, N exact-text branches one casefolded set lookup.
+        uids = [f for f in flat if isinstance(f, _UserIdImpl)]
+        if len(uids) > 1:
+            flat = [f for f in flat if not isinstance(f, _UserIdImpl)]
+            flat.append(_UserIdSet(frozenset(f.user_id for f in uids)))
+        txts = [f for f in flat if isinstance(f, _TextImpl)]
+        if len(txts) > 1:
+            flat = [f for f in flat if not isinstance(f, _TextImpl)]
+            flat.append(_TextSet(frozenset(f.text for f in txts)))
+        # Fuse sibling command filters into a single compiled alternation so
+        # the message is scanned once instead of once per branch.
+        cmds = [f for f in flat if isinstance(f, _CommandImpl)]
+        if len(cmds) > 1:
+            pattern = re.compile(
+                "^(?:" + "|".join(re.escape(c.command) for c in cmds) + ")",
+                re.IGNORECASE,
+            )
+            flat = [f for f in flat if not isinstance(f, _CommandImpl)]
+            flat.append(_RegexAnyFilter(pattern))
+        flat.sort(key=lambda f: (-getattr(f, '_selectivity', 0.5), getattr(f, '_cost', 5)))
+        self.filters = tuple(flat)
+        n = len(self.filters)
+        if n == 2:
+            a, b = self.filters
+            self._call = lambda client, message, a=a, b=b: a(client, message) or b(client, message)
+        elif n == 3:
+            a, b, d = self.filters
+            self._call = lambda client, message, a=a, b=b, d=d: a(client, message) or b(client, message) or d(client, message)
+        else:
+            def _call(client, message, _fs=self.filters):
+                for f in _fs:
+                    if f(client, message):
+                        return True
+                return False
+            self._call = _call
+
+    def __call__(self, client, message) -> bool:
+        return self._call(client, message)
+
+class _And2(Filter):
+    __slots__ = ("a", "b")
+
+    # Specialized AND for the common two-leaf `a & b` case: one short-circuit
+    # `and` with no tuple iteration.
+    _cost = 10
+
+    def __init__(self, a: Filter, b: Filter):
+        self.a = a
+        self.b = b
+
+    def __call__(self, client, message) -> bool:
+        return self.a(client, message) and self.b(client, message)
+
+class _Or2(Filter):
+    __slots__ = ("a", "b")
+
+    # Specialized OR for the common two-leaf `a | b` case.
+    _cost = 10
+
+    def __init__(self, a: Filter, b: Filter):
+        self.a = a
+        self.b = b
+
+    def __call__(self, client, message) -> bool:
+        return self.a(client, message) or self.b(client, message)
+
+class NotFilter(Filter):
+    __slots__ = ("filter",)
+
+    def __init__(self, filter: Filter):
+        self.filter = filter
+
+    def __call__(self, client, message) -> bool:
+        return not self.filter(client, message)
+
+    def __invert__(self) -> 'Filter':
+        # ~~x is x; unwrap instead of stacking a second negation.
+        return self.filter
+
+# region _folded()
+def _folded(message):
+    """Returns message.text casefolded, memoized on the message when possible."""
+    t = message.text
+    if t is None:
+        return None
+    fo = getattr(message, '_text_fold', None)
+    if fo is None:
+        fo = t.casefold()
+        try:
+            message._text_fold = fo
+        except AttributeError:
+            pass
+    return fo
+
+class _TextImpl(Filter):
+    __slots__ = ("text",)
+
+    _cost = 2
+    _selectivity = 0.1
+
+    def __init__(self, text: str):
+        """
+        A filter that matches messages with exact text (case-insensitive).
+
+        Args:
+            text (str): The text to match against the message's text.
+
+        Attributes:
+            text (str): The casefolded text to match.
+        """
+        self.text = text.casefold()
+
+    def __call__(self, client, message) -> bool:
+        """
+        Checks if the message text matches the specified text.
+
+        Args:
+            client (MaxClient): The client instance handling the message.
+            message (Message): The message to evaluate.
+
+        Returns:
+            bool: True if the message text matches (case-insensitive), False otherwise.
+        """
+        t = message.text
+        if not t:
+            return False
+        # No raw-length pre-check: casefolding can change length (straße ->
+        # strasse), and the fused _TextSet path has no such check either —
+        # both paths must agree.
+        return _folded(message) == self.text
+
+class _CommandImpl(Filter):
+    __slots__ = ("command", "_clen", "command_token")
+
+    _cost = 2
+    _selectivity = 0.2
+
+    def __init__(self, command: str, prefix: str = "/"):
+        """
+        A filter that matches messages starting with a specific command (case-insensitive).
+
+        Args:
+            command (str): The command to match (without prefix).
+            prefix (str, optional): The command prefix (e.g., "/"). Defaults to "/".
+
+        Attributes:
+            command (str): The full command string (prefix + command, casefolded).
+        """
+        self.command = (prefix + command).casefold()
+        self._clen = len(self.command)
+        # Exposed for MaxClient's O(1) command dispatch; only standard
+        # "/"-prefixed commands participate in the token table.
+        self.command_token = self.command[1:] if prefix == "/" else None
+
+    def __call__(self, client, message) -> bool:
+        """
+        Checks if the message text starts with the specified command.
+
+        Args:
+            client (MaxClient): The client instance handling the message.
+            message (Message): The message to evaluate.
+
+        Returns:
+            bool: True if the message text starts with the command (case-insensitive), False otherwise.
+        """
+        t = message.text
+        if not t:
+            return False
+        c = self._clen
+        return len(t) >= c and t[:c].casefold() == self.command
+
+class _RegexAnyFilter(Filter):
+    # Fused OR of several command filters: one regex alternation evaluated
+    # once per message.
+    __slots__ = ("pattern",)
+
+    _cost = 2
+    _selectivity = 0.2
+
+    def __init__(self, pattern):
+        self.pattern = pattern
+
+    def __call__(self, client, message) -> bool:
+        t = message.text
+        return t is not None and self.pattern.match(t) is not None
+
+class _UserIdSet(Filter):
+    # Fused OR of several user_id filters: one set-membership test instead of
+    # N string compares.
+    __slots__ = ("_ids",)
+
+    _cost = 1
+    _selectivity = 0.2
+
+    def __init__(self, ids: frozenset):
+        self._ids = ids
+
+    def __call__(self, client, message) -> bool:
+        return message.sender in self._ids
+
+class _TextSet(Filter):
+    # Fused OR of several exact-text filters, matched casefolded.
+    __slots__ = ("_texts",)
+
+    _cost = 2
+    _selectivity = 0.2
+
+    def __init__(self, texts: frozenset):
+        self._texts = texts
+
+    def __call__(self, client, message) -> bool:
+        t = message.text
+        if not t:
+            return False
+        return _folded(message) in self._texts
+
+class _UserIdImpl(Filter):
+    __slots__ = ("user_id",)
+
+    _cost = 1
+    _selectivity = 0.1
+
+    def __init__(self, user_id: str):
+        """
+        A filter that matches messages from a specific user ID.
+
+        Args:
+            user_id (str): The user ID to match against the message's sender.
+
+        Attributes:
+            user_id (str): The user ID to match.
+        """
+        self.user_id = sys.intern(user_id) if type(user_id) is str else user_id
+
+    def __call__(self, client, message) -> bool:
+        """
+        Checks if the message sender matches the specified user ID.
+
+        Args:
+            client (MaxClient): The client instance handling the message.
+            message (Message): The message to evaluate.
+
+        Returns:
+            bool: True if the message sender matches the user ID, False otherwise.
+        """
+        s = message.sender
+        return s is self.user_id or s == self.user_id
+
+class me(Filter):
+    """
+    A filter that matches messages sent by the authenticated user.
+
+    This filter checks if the message sender matches the ID of the authenticated user (`client.me.contact.id`).
+    """
+
+    __slots__ = ()
+
+    _cost = 3
+
+    def __call__(self, client, message) -> bool:
+        """
+        Checks if the message sender is the authenticated user.
+
+        Args:
+            client (MaxClient): The client instance handling the message.
+            message (Message): The message to evaluate.
+
+        Returns:
+            bool: True if the message sender is the authenticated user, False otherwise.
+
+        Raises:
+            ValueError: If the client has no authenticated user (client.me is None).
+        """
+        mid = getattr(client, '_me_id', None)
+        if mid is None:
+            raise ValueError("No authenticated user found. Please authenticate first.")
+        return message.sender == mid
+
+class _any(Filter):
+    """
+    A filter that passes all messages.
+
+    This filter always returns True, allowing any message to pass.
+    """
+
+    __slots__ = ()
+
+    _cost = 0
+    _selectivity = 1.0
+
+    def __call__(self, client, message) -> bool:
+        """
+        Always passes the message.
+
+        Args:
+            client (MaxClient): The client instance handling the message.
+            message (Message): The message to evaluate.
+
+        Returns:
+            bool: Always True.
+        """
+        return True
+    
+class _never(Filter):
+    """
+    A filter that rejects all messages.
+
+    The constant-False counterpart of `_any`, produced by folding (e.g.
+    `~filters.any`); composites containing it collapse at construction.
+    """
+
+    __slots__ = ()
+
+    _cost = 0
+    _selectivity = 0.0
+
+    def __call__(self, client, message) -> bool:
+        return False
+
+# Shared singleton: `filters.any` exposes this instance, so composites can
+# recognize it with a pointer compare before falling back to isinstance.
+_ANY_FILTER = _any()
+_NEVER_FILTER = _never()
+
+# Leaf filters are interned by (kind, args): fifty handlers filtering on the
+# same command share one instance instead of fifty. Weak values let unused
+# entries disappear with their last handler.
+_LEAF_CACHE = WeakValueDictionary()
+
+# region text()
+def text(text: str) -> _TextImpl:
+    """Returns the shared exact-text filter for `text`."""
+    key = ('text', text)
+    f = _LEAF_CACHE.get(key)
+    if f is None:
+        f = _TextImpl(text)
+        _LEAF_CACHE[key] = f
+    return f
+
+# region command()
+def command(command: str, prefix: str = "/") -> _CommandImpl:
+    """Returns the shared command filter for `prefix + command`."""
+    key = ('command', prefix, command)
+    f = _LEAF_CACHE.get(key)
+    if f is None:
+        f = _CommandImpl(command, prefix)
+        _LEAF_CACHE[key] = f
+    return f
+
+# region user_id()
+def user_id(user_id: str) -> _UserIdImpl:
+    """Returns the shared sender filter for `user_id`."""
+    key = ('user_id', user_id)
+    f = _LEAF_CACHE.get(key)
+    if f is None:
+        f = _UserIdImpl(user_id)
+        _LEAF_CACHE[key] = f
+    return f
+
+class user(Filter):
+    """
+    A filter that matches messages sent by the user.
+
+    This filter checks if the message sender is user.
+    """
+
+    __slots__ = ()
+
+    _cost = 3
+    _selectivity = 0.9
+
+    def __call__(self, client, message) -> bool:
+        """
+        Checks if the message sender is the authenticated user.
+
+        Args:
+            client (MaxClient): The client instance handling the message.
+            message (Message): The message to evaluate.
+
+        Returns:
+            bool: True if the message was sent by a regular user, False otherwise.
+        """
+        return message.type == "USER"
+
+# region compile_batch()
+def compile_batch(pipeline, client=None):
+    """
+    Compiles a filter tree into a single batch predicate for offline replays.
+
+    Walks `pipeline` once and fuses it into one closure per row: user_id
+    leaves become set membership, text leaves compare against casefolded
+    needles, and And/Or nodes short-circuit inline — no per-(message, filter)
+    Python dispatch. Returns `run(senders, texts, types=None) -> list[bool]`
+    evaluating the pipeline over parallel columns. `client` is only needed
+    when the tree contains a `me` filter. Live dispatch keeps the normal
+    per-message path; this is for batch-replay workloads.
+
+    Raises:
+        TypeError: If the tree contains a filter type with no batch lowering.
+    """
+    def _compile(f):
+        if isinstance(f, _any):
+            return lambda s, t, fo, ty: True
+        if isinstance(f, _never):
+            return lambda s, t, fo, ty: False
+        if isinstance(f, _UserIdImpl):
+            uid = f.user_id
+            return lambda s, t, fo, ty: s == uid
+        if isinstance(f, _TextImpl):
+            needle = f.text
+            return lambda s, t, fo, ty: fo == needle
+        if isinstance(f, _CommandImpl):
+            c, n = f.command, f._clen
+            return lambda s, t, fo, ty: t is not None and len(t) >= n and t[:n].casefold() == c
+        if isinstance(f, _RegexAnyFilter):
+            m = f.pattern.match
+            return lambda s, t, fo, ty: t is not None and m(t) is not None
+        if isinstance(f, _UserIdSet):
+            ids = f._ids
+            return lambda s, t, fo, ty: s in ids
+        if isinstance(f, _TextSet):
+            txts = f._texts
+            return lambda s, t, fo, ty: fo in txts
+        if isinstance(f, me):
+            mid = getattr(client, '_me_id', None)
+            if mid is None:
+                raise ValueError("compile_batch needs an authenticated client for the me filter")
+            return lambda s, t, fo, ty: s == mid
+        if isinstance(f, user):
+            return lambda s, t, fo, ty: ty == "USER"
+        if isinstance(f, NotFilter):
+            inner = _compile(f.filter)
+            return lambda s, t, fo, ty: not inner(s, t, fo, ty)
+        if isinstance(f, (_And2, _Or2)):
+            a, b = _compile(f.a), _compile(f.b)
+            if isinstance(f, _And2):
+                return lambda s, t, fo, ty: a(s, t, fo, ty) and b(s, t, fo, ty)
+            return lambda s, t, fo, ty: a(s, t, fo, ty) or b(s, t, fo, ty)
+        if isinstance(f, (AndFilter, OrFilter)):
+            children = f.filters
+            if isinstance(f, OrFilter):
+                # Fuse homogeneous OR branches into set membership.
+                ids = frozenset(c.user_id for c in children if isinstance(c, _UserIdImpl))
+                txts = frozenset(c.text for c in children if isinstance(c, _TextImpl))
+                rest = [_compile(c) for c in children
+                        if not isinstance(c, (_UserIdImpl, _TextImpl))]
+                return lambda s, t, fo, ty: (
+                    (bool(ids) and s in ids)
+                    or (bool(txts) and fo in txts)
+                    or any(p(s, t, fo, ty) for p in rest)
+                )
+            preds = [_compile(c) for c in children]
+            return lambda s, t, fo, ty: all(p(s, t, fo, ty) for p in preds)
+        raise TypeError(f"no batch lowering for filter {type(f).__name__}")
+
+    pred = _compile(pipeline)
+
+    def run(senders, texts, types=None):
+        if types is None:
+            types = [None] * len(senders)
+        out = []
+        append = out.append
+        for s, t, ty in zip(senders, texts, types):
+            fo = t.casefold() if t is not None else None
+            append(pred(s, t, fo, ty))
+        return out
+
+    return run
+
+class filters:
+    text = text
+    command = command
+    user_id = user_id
+    me = me
+    user = user
+    any = _ANY_FILTER
+
+# Both namespace spellings resolve to the same class; isinstance-based
+# optimizations rely on a single copy of these filter classes being loaded.
+Filters = filters
+
+assert Filter.__module__ == __name__
\ No newline at end of file
@@ -1,797 +1,1004 @@
-from websockets.sync.client import connect
-import json
-import threading
-import time
-from uuid import uuid4
-from classes import *
-from errors import *
-
-# region class MaxClient
-class MaxClient:
-    def __init__(self, token: str = None, phone: str = None):
-        """
-        Initializes a new instance of the MaxClient class.
-
-        This constructor sets up the client with optional authentication token and phone number.
-        It prepares internal state for sequence numbering, user agent generation, WebSocket connection,
-        and event handlers.
-
-        Usage:
-            ```
-            # You can use only token or only phone if have one.
-            client = MaxClient(token="token", phone="number")
-            # Now you can use client methods like connect(), auth(), etc.
-            ```
-        """
-
-        # print("Loaded WebMaxLib")
-
-        self._seq = 0
-
-        self.phone_number = phone
-        self.auth_token = token
-        self.user_agent = self._generate_user_agent()
-
-        self.websocket = None
-    
-        self._19_payload = None
-        self._on_connect = None
-        self._connected = False
-        self._t = None
-        self._t_stop = False
-
-        self.is_log_in = False
-        self.me = None
-        self.session_id = int(time.time()*1000)
-
-        self.handlers = []
-
-    # region seq
-    @property
-    def seq(self):
-        current_seq = self._seq
-        self._seq += 1
-        return current_seq
-    
-    # region cid
-    @property
-    def cid(self):
-        return int(time.time() * 1000)
-    
-    # region marker
-    @property
-    def marker(self):
-        return int("900"+str(int(time.time())))
-
-    # region _generate_user_agent()
-    def _generate_user_agent(self) -> str:
-        return json.dumps({
-            "ver": 11,
-            "cmd": 0,
-            "seq": self.seq,
-            "opcode": 6,
-            "payload": {
-                "userAgent": {
-                    "deviceType": "WEB",
-                    "locale": "ru",
-                    "osVersion": "Linux",
-                    "deviceName": "WebMax Lib",
-                    "headerUserAgent": "Mozilla/5.0 (X11; Ubuntu; Linux x86_64; rv:135.0) Gecko/20100101 Firefox/135.0",
-                    "deviceLocale": "ru",
-                    "appVersion": "4.8.42",
-                    "screen": "1080x1920 1.0x",
-                    "timezone": "Europe/Moscow"
-                },
-                "deviceId": str(uuid4())
-            }
-        })
-
-    # region connect()
-    def connect(self, _f=None):
-        """
-        Establishes a WebSocket connection to the server.
-
-        This method connects to the WebSocket endpoint, sends the user agent, and authenticates using the token.
-        It sets the client to connected state and retrieves the user profile.
-
-        Usage:
-            ```
-            # You can use only token or only phone if have one.
-            client = MaxClient(token="token", phone="number")
-            client.connect()
-            # Call this after setting the auth_token to establish the connection.
-            ```
-        """
-        if self._connected:
-            return
-        self.websocket = connect("wss://ws-api.oneme.ru/websocket")
-        self.websocket.send(self.user_agent)
-        self.websocket.recv()
-
-        if _f:
-            return
-
-        self.websocket.send(json.dumps({
-            "ver": 11,
-            "cmd": 0,
-            "seq": self.seq,
-            "opcode": 19, 
-            "payload": {
-                "interactive": True,
-                "token": self.auth_token,
-                "chatsSync": 0,
-                "contactsSync": 0,
-                "presenceSync": 0,
-                "draftsSync": 0,
-                "chatsCount": 40
-            }
-        }))
-
-        p = json.loads(self.websocket.recv())['payload']
-        usr = User(self, p['profile'])
-        self.me = usr
-        self._connected = True
-
-        if self._on_connect:
-            self._on_connect()
-
-    # region disconnect()
-    def disconnect(self):
-        """
-        Closes the WebSocket connection and resets the client state.
-
-        This method safely disconnects from the server and resets internal flags and sequence.
-
-        Usage:
-            ```
-            # You can use only token or only phone if have one.
-            client = MaxClient(token="token", phone="number")
-            client.disconnect()
-            # Call this to cleanly close the connection when done.
-            ```
-        """
-        if not self._connected:
-            return
-        if self.websocket:
-            self.websocket.close()
-            self._seq = 0
-        self._connected = False
-        self.websocket = None
-
-    # region set_token()
-    def set_token(self, token):
-        """
-        Sets the authentication token for the client.
-
-        This updates the auth_token used for connecting to the server.
-
-        Usage:
-            ```
-            # You can use only token or only phone if have one.
-            client = MaxClient(token="token", phone="number")
-            client.set_token("new_auth_token")
-            # Use this to update the token before connecting or reconnecting.
-            ```
-        """
-        self.auth_token = token
-
-    # region _hlprocessor()
-    def _hlprocessor(self, msg: Message):
-        """Internal worker. Don't touch."""
-        for filter, func in self.handlers:
-            if filter(self, msg):
-                func(self, msg)
-                return  
-
-    # region _listener()
-    def _listener(self):
-        """Internal listener. Don't touch."""
-        while not self._t_stop:
-            try:
-                recv = json.loads(self.websocket.recv())
-            except Exception as e:
-                print(e)
-                exit(0)
-                raise
-            opcode = recv["opcode"]
-            payload = recv["payload"]
-            
-            match opcode:
-                case 1:
-                    self.websocket.send(json.dumps({
-                        "ver": 11,
-                        "cmd": 0,
-                        "seq": self.seq,
-                        "opcode": 1,
-                        "payload": {"interactive": False}
-                    }))
-                    self.websocket.recv()
-
-                case 128:
-                    # print(recv)
-                    msg = Message(self, payload["chatId"], **payload["message"])
-                    self._hlprocessor(msg)
-
-                case _:
-                    pass
-
-            print(json.dumps(recv, ensure_ascii=False, indent=4))
-        self._t_stop = False
-
-    # region run()
-    def run(self):
-        """
-        Starts the client by connecting and launching the listener thread.
-
-        This connects to the server and begins listening for messages in a background thread.
-
-        Usage:
-            ```
-            # You can use only token or only phone if have one.
-            client = MaxClient(token="token", phone="number")
-            client.run()
-            ```
-        """
-        self.connect()
-        self._t = threading.Thread(target=self._listener, name="WebMaxListener")
-        self._t.start()
-    
-    def stop(self):
-        """
-        Stops the listener thread and disconnects from the server.
-
-        This signals the listener to stop and closes the connection.
-
-        Usage:
-            ```
-            # You can use only token or only phone if have one.
-            client = MaxClient(token="token", phone="number")
-
-            @client.on_connect # Using onconnect decorator
-            def onconnect():
-                client.stop() # Stops client after run
-
-            client.run()
-            ```
-        """
-        self._t_stop = True
-        self.disconnect()
-
-    # region _start_auth()
-    def _start_auth(self, phone_number) -> dict:
-        """
-        Initiates the authentication process by sending a phone number to receive a verification code.
-
-        This sends a request to start authentication and returns the server response.
-
-        Usage:
-            ```
-            # You can use only token or only phone if have one.
-            client = MaxClient(token="token", phone="number")
-            response = client._start_auth("your_phone_number")
-            ```
-        """
-        self.connect(_f=1)
-        if self.is_log_in:
-            raise ValueError("Client is logged in now")
-        
-        self.websocket.send(json.dumps({
-            "ver": 11,
-            "cmd": 0,
-            "seq": self.seq,
-            "opcode": 17,
-            "payload": {
-                "phone": phone_number,
-                "type": "START_AUTH",
-                "language": "ru"
-            }
-        }))
-
-        return json.loads(self.websocket.recv()) # experimental
-    
-    # region _check_code()
-    def _check_code(self, token, code) -> dict:
-        self.websocket.send(json.dumps({
-            "ver": 11,
-            "cmd": 0,
-            "seq": self.seq,
-            "opcode": 18,
-            "payload": {
-                "token": token,
-                "verifyCode": code,
-                "authTokenType": "CHECK_CODE"
-            }
-        }))
-
-        token_resp = json.loads(self.websocket.recv())
-        payload = token_resp['payload']
-        error = token_resp['payload'].get("error", None)
-
-        if error == "verify.code.wrong":
-            raise VerifyCodeWrong(payload["error"], payload["title"])
-        return token_resp
-
-    # region auth()
-    def auth(self, phone_number: str):
-        """
-        Performs the full authentication process interactively.
-
-        This connects, starts auth, prompts for the code, verifies it, and sets the auth_token.
-        Returns the User object for the authenticated user.
-
-        Usage:
-        ```
-        user = client.auth("+7xxxxxxxxxx")
-        # Follow the prompt to enter the SMS code.
-        ```
-        """
-
-        code_resp = self._start_auth(phone_number)
-
-        if code_resp.get('payload', {}).get('error'):
-            raise ValueError(code_resp['payload']['error'] + ": " + code_resp['payload']['localizedMessage'])
-            
-        token = code_resp['payload']['token']
-        print(f"Auth token received. Please enter the code sent to your phone.\n")
-
-        while True:
-            try:
-                code = input("Auth code: ")
-                token_resp = self._check_code(token, code)
-
-                payload = token_resp['payload']
-                break
-
-            except VerifyCodeWrong as vcw:
-                print(f"{vcw.title} ({vcw.error})")
-                continue
-
-            except Exception as e:
-                print(e)
-                continue
-
-        self.auth_token = payload['tokenAttrs']['LOGIN']['token']
-        usr = User(self, payload['profile'])
-        self.me = usr
-        return self.me
-
-    # region get_chats()
-    # DONT USE THIS! BROKEN
-    # def get_chats(self, count = 40) -> dict:
-    #     if not self.auth_token:
-    #         raise ValueError("No auth token provided. Please authenticate first.")
-
-    #     self.websocket.send(json.dumps({
-    #         "ver": 11,
-    #         "cmd": 0,
-    #         "seq": self.seq,
-    #         "opcode": 19,
-    #         "payload": {
-    #             "interactive": True,
-    #             "token": self.auth_token,
-    #             "chatsSync": 0,
-    #             "contactsSync": 0,
-    #             "presenceSync": 0,
-    #             "draftsSync": 0,
-    #             "chatsCount": count
-    #         }
-    #     }))
-
-    #     response = json.loads(self.websocket.recv())
-    #     return response
-
-    # region send_message()
-    def send_message(self, chat_id: int, text: str, reply_id: str|int = None, notify: bool = True):
-        """
-        Sends a text message to a specified chat.
-
-        This method constructs and sends a text message to the given chat ID, with an optional reply to another message.
-        It waits for the server response with the matching sequence number and returns a `Message` object.
-
-        Args:
-            chat_id (int): The ID of the chat to send the message to.
-            text (str): The text content of the message.
-            reply_id (str | int, optional): The ID of the message to reply to. Defaults to None.
-            notify (bool, optional): Whether to notify chat participants. Defaults to True.
-
-        Returns:
-            Message: A `Message` object representing the sent message.
-
-        Raises:
-            ValueError: If the client is not connected or authenticated.
-            Exception: If the server response cannot be parsed into a `Message` object.
-
-        Usage:
-            ```python
-            # Send a simple message
-            msg = client.send_message(12345678, "Hello, world!")
-            
-            # Send a message with a reply
-            msg = client.send_message(12345678, "Replying to you!", reply_id=987654)
-            ```
-        """
-        seq = self.seq
-        j = {
-            "ver":11,
-            "cmd":0,
-            "seq":seq,
-            "opcode":64,
-            "payload": {
-                "chatId":chat_id,
-                "message": {
-                    "text":text,
-                    "cid": self.cid,
-                    "elements":[],
-                    "attaches":[]
-                },
-                "notify": notify
-            }
-        }
-
-        if reply_id:
-            j["payload"]["message"]["link"] = {
-                "type": "REPLY",
-                "messageId": str(reply_id)
-            }
-
-        self.websocket.send(json.dumps(j))
-        while True:
-            recv = json.loads(self.websocket.recv())
-            if recv["seq"] != seq:
-                pass
-            else:
-                break
-        payload = recv["payload"]
-        try:
-            msg = Message(self, payload["chatId"], **payload["message"])
-        
-            return msg
-        except:
-            raise
-
-    # region delete_message()
-    def delete_message(self, chat_id: int, message_ids: list[str], for_me: bool = False):
-        """
-        Deletes one or more messages from a specified chat.
-
-        This method sends a request to delete messages identified by their IDs in the given chat.
-        The `for_me` parameter determines whether the deletion is only for the current user or for all chat participants.
-
-        Args:
-            chat_id (int): The ID of the chat containing the messages.
-            message_ids (list[str]): A list of message IDs to delete.
-            for_me (bool, optional): If True, deletes the messages only for the current user. Defaults to False.
-
-        Raises:
-            ValueError: If the client is not connected or authenticated.
-
-        Usage:
-            ```python
-            # Delete messages for all participants
-            client.delete_message(12345678, ["1000121", "1000122"])
-            
-            # Delete messages only for the current user
-            client.delete_message(12345678, ["1000120"], for_me=True)
-            ```
-        """
-        self.websocket.send(json.dumps({
-            "ver":11,
-            "cmd":0,
-            "seq":self.seq,
-            "opcode":66,
-            "payload": {
-                "chatId":chat_id,
-                "messageIds": message_ids,
-                "forMe": for_me
-            }
-        }))
-
-    # region edit_message()
-    def edit_message(self, chat_id: int, message_id: str|int, text: str):
-        """
-        Edits the text of an existing message in a specified chat.
-
-        This method sends a request to update the text of a message identified by its ID in the given chat.
-        It waits for the server response with the matching sequence number and returns the updated `Message` object.
-
-        Args:
-            chat_id (int): The ID of the chat containing the message.
-            message_id (str | int): The ID of the message to edit.
-            text (str): The new text content for the message.
-
-        Returns:
-            Message: A `Message` object representing the edited message.
-
-        Raises:
-            ValueError: If the client is not connected, not authenticated, or the response cannot be parsed.
-
-        Usage:
-            ```python
-            # Edit an existing message
-            updated_msg = client.edit_message(12345678, "12111121", "New text")
-            ```
-        """
-        seq = self.seq
-        self.websocket.send(json.dumps({
-            "ver": 11,
-            "cmd": 0,
-            "seq": seq,
-            "opcode": 67,
-            "payload": {
-                "chatId": chat_id,
-                "messageId": str(message_id),
-                "text": text,
-                "elements": [],
-                "attachments": []
-            }
-        }))
-
-        while True:
-            recv = json.loads(self.websocket.recv())
-            if recv["seq"] != seq:
-                pass
-            else:
-                break
-        payload = recv["payload"]
-        msg = Message(self, chat_id, **payload["message"])
-        
-        return msg
-    
-    # region pin_chat()
-    def pin_chat(self, chat_id: int|str):
-        j = {
-            "ver": 11,
-            "cmd": 0,
-            "seq": self.seq,
-            "opcode": 22,
-            "payload": {
-                "settings": {
-                    "chats": {
-                        str(chat_id): {
-                            "favIndex": int(time.time()*1000)
-                        }
-                    }
-                }
-            }
-        }
-        self.websocket.send(json.dumps(j))
-        return True
-
-    # region unpin_chat()
-    def unpin_chat(self, chat_id: int|str):
-        j = {
-            "ver": 11,
-            "cmd": 0,
-            "seq": self.seq,
-            "opcode": 22,
-            "payload": {
-                "settings": {
-                    "chats": {
-                        str(chat_id): {
-                            "favIndex": 0
-                        }
-                    }
-                }
-            }
-        }
-        self.websocket.send(json.dumps(j))
-        return True
-    
-    # region get_user()
-    def get_user(self, **kwargs):
-        """
-        Retrieves a user's profile by their ID or phone number.
-
-        Args:
-            - id (int, optional) : The contact ID of the user to retrieve.
-            - phone (str, optional) : The phone number of the user to retrieve.
-            - chat_id (int, optional) : The chat ID with the user to retrieve.
-
-        Returns:
-            User: A `User` object representing the retrieved user's profile.
-
-        Raises:
-            ValueError: If neither `id` nor `phone` is provided, or if the client is not connected or authenticated.
-            WebSocketError: If there is an issue with the WebSocket communication.
-
-        Usage:
-            ```python
-            # Get user by ID
-            user = client.get_user(id="123456")
-            print(user.contact.names[0].name)  # Prints the user's full name
-
-            # Get user by phone number
-            user = client.get_user(phone="+7xxxxxxxxxx")
-            print(user.contact.phone)  # Prints the user's phone number
-        """
-        id = kwargs.get('id')
-        phone = kwargs.get('phone')
-        chat_id = kwargs.get('chat_id')
-        _f = kwargs.get("_f")
-        seq = self.seq
-
-        if id:
-            j = {"ver":11,"cmd":0,"seq":seq,"opcode":32,"payload":{"contactIds":[id]}}
-        elif phone:
-            j = {"ver":11,"cmd":0,"seq":seq,"opcode":46,"payload":{"phone":str(phone)}}
-        elif chat_id:
-            id = self.me.contact.id ^ chat_id
-            j = {"ver":11,"cmd":0,"seq":seq,"opcode":32,"payload":{"contactIds":[id]}}
-        else:
-            raise ValueError("no `id` or `phone` or `chat_id` provided")
-        
-        self.websocket.send(json.dumps(j))
-
-        while True:
-            recv = json.loads(self.websocket.recv())
-            if recv["seq"] != seq:
-                pass
-            else:
-                break
-
-        payload = recv["payload"]
-
-        error = payload.get("error")
-
-        if error:
-            raise UserNotFound(error, payload["message"]+f": {phone}")
-
-        if id:
-            contact = payload["contacts"][0]
-        if phone:
-            payload["contact"]["phone"] = phone
-            contact = payload["contact"]
-
-        return User(self, contact, _f)
-
-    # region session_exit()
-    def session_exit(self):
-        """Terminates active session token. **There no way back.**"""
-        j = {"ver":11,"cmd":0,"seq":self.seq,"opcode":20,"payload":{}}
-        self.websocket.send(json.dumps(j))
-        self.disconnect()
-        return True
-    
-    # region set_reaction()
-    def set_reaction(self, chat_id, message_id, reaction: EMOJIS):
-        """
-        Sets a reaction to a specific message in a chat.
-
-        This function sends a reaction to a message and return a Reactions object.
-
-        Args:
-            chat_id (str): The unique identifier of the chat.
-            message_id (str): The unique identifier of the message.
-            reaction (EMOJIS): The emoji reaction to be set, using the EMOJIS enumeration.
-
-        Returns:
-            Reactions: An object containing information about the updated message reactions,
-                    including counters for each emoji, your own reaction, and the total count.
-        """
-        seq = self.seq
-        j = {"ver":11,"cmd":0,"seq":seq,"opcode":178,"payload":{"chatId":chat_id,"messageId":message_id,"reaction":{"reactionType":"EMOJI","id":reaction}}}
-        self.websocket.send(json.dumps(j))
-
-        while True:
-            recv = json.loads(self.websocket.recv())
-            if recv["seq"] != seq:
-                pass
-            else:
-                break
-
-        payload = recv["payload"] # {"ver":11,"cmd":1,"seq":79,"opcode":178,"payload":{"reactionInfo":{"counters":[{"count":1,"reaction":"â¤ï¸"}],"yourReaction":"â¤ï¸","totalCount":1}}}
-        
-        return Reactions(**payload)
-    
-    # region contact_add()
-    def contact_add(self, user_id: int):
-        seq = self.seq
-        j = {"ver":11, "cmd":0, "seq":seq, "opcode":34, "payload":{"contactId": user_id, "action": "ADD"}}
-        self.websocket.send(json.dumps(j))
-
-        while True:
-            recv = json.loads(self.websocket.recv())
-            if recv["seq"] != seq:
-                pass
-            else:
-                break
-        payload = recv["payload"]
-
-        return User(self, payload["contact"])
-    
-    # region contact_remove()
-    def contact_remove(self, user_id: int):
-        seq = self.seq
-        j = {"ver":11, "cmd":0, "seq":seq, "opcode":34, "payload":{"contactId": user_id, "action": "REMOVE"}}
-        self.websocket.send(json.dumps(j))
-
-        while True:
-            recv = json.loads(self.websocket.recv())
-            if recv["seq"] != seq:
-                pass
-            else:
-                break
-            
-        return True
-    
-    # region contact_block()
-    def contact_block(self, user_id: int):
-        seq = self.seq
-        j = {"ver":11, "cmd":0, "seq":seq, "opcode":34, "payload":{"contactId": user_id, "action": "BLOCK"}}
-        self.websocket.send(json.dumps(j))
-
-        while True:
-            recv = json.loads(self.websocket.recv())
-            if recv["seq"] != seq:
-                pass
-            else:
-                break
-            
-        return True
-    
-    # region contact_unblock()
-    def contact_unblock(self, user_id: int):
-        seq = self.seq
-        j = {"ver":11, "cmd":0, "seq":seq, "opcode":34, "payload":{"contactId": user_id, "action": "UNBLOCK"}}
-        self.websocket.send(json.dumps(j))
-
-        while True:
-            recv = json.loads(self.websocket.recv())
-            if recv["seq"] != seq:
-                pass
-            else:
-                break
-            
-        return True
-                
-    # region @on_message()
-    def on_message(self, filters):
-        """
-        Decorator to register a handler for a specific message type.
-
-        This allows defining functions to handle certain events or messages by text key.
-
-        Usage:
-        ```
-        from max import MaxClient as Client
-        from filters import filters
-        from classes import Message
-
-        client = Client("token")
-
-        @client.on_message(filters.command("hello"))
-        def command_hello(client: Client, message: Message):
-            message.reply("Max - самый забагованный мессенджер.")
-        # The decorated function will be called when the filter event occurs.
-
-        client.run()
-        ```
-        """
-        def decorator(func):
-            self.handlers.append((filters, func))
-            return func
-
-        return decorator
-    
-    #region @on_connect
-    def on_connect(self, func):
-        """
-        Registers a callback function to be called upon successful connection.
-
-        This sets a handler that is invoked after connecting and authenticating.
-
-        Usage:
-        ```
-        from max import MaxClient as Client
-
-        client = Client("token")
-
-        @client.on_connect
-        def on_connect_handler():
-            print("Connected!")
-        # The function will be called automatically on connect.
-        client.run()
-        ```
-        """
-        self._on_connect = func
+from websockets.sync.client import connect
+from websockets.asyncio.client import connect as aconnect
+from websockets.exceptions import ConnectionClosed
+import asyncio
+import itertools
+import json
+import logging
+import queue
+import sys
+import threading
+import time
+from uuid import uuid4
+from classes import *
+from errors import *
+
+try:
+    import orjson
+    _dumps = lambda o: orjson.dumps(o).decode()
+    _loads = orjson.loads
+except ImportError:
+    _dumps = json.dumps
+    _loads = json.loads
+
+logger = logging.getLogger(__name__)
+
+# Hot frame keys, interned once so lookups on parsed frames hit the
+# pointer-compare fast path (orjson does not intern the keys it produces).
+_SEQ = sys.intern("seq")
+_CMD = sys.intern("cmd")
+_OPCODE = sys.intern("opcode")
+_PAYLOAD = sys.intern("payload")
+_CHAT_ID = sys.intern("chatId")
+_MESSAGE = sys.intern("message")
+
+# Frame templates for the hottest request paths: everything constant is
+# pre-serialized, only seq/ids/text are spliced in per call. Text and
+# message ids go through _dumps so JSON escaping stays correct.
+_SEND_TPL = '{"ver":11,"cmd":0,"seq":%d,"opcode":64,"payload":{"chatId":%d,"message":{"text":%s,"cid":%d,"elements":[],"attaches":[]},"notify":%s}}'
+_SEND_TPL_REPLY = '{"ver":11,"cmd":0,"seq":%d,"opcode":64,"payload":{"chatId":%d,"message":{"text":%s,"cid":%d,"elements":[],"attaches":[],"link":{"type":"REPLY","messageId":%s}},"notify":%s}}'
+_EDIT_TPL = '{"ver":11,"cmd":0,"seq":%d,"opcode":67,"payload":{"chatId":%d,"messageId":%s,"text":%s,"elements":[],"attachments":[]}}'
+_LOGIN_TPL = '{"ver":11,"cmd":0,"seq":%d,"opcode":19,"payload":{"interactive":true,"token":%s,"chatsSync":0,"contactsSync":0,"presenceSync":0,"draftsSync":0,"chatsCount":40}}'
+
+# region class MaxClient
+class MaxClient:
+    __slots__ = (
+        "_seq_iter", "phone_number", "auth_token", "user_agent", "websocket",
+        "_19_payload", "_on_connect", "_connected", "_t", "_t_stop",
+        "_send_q", "_w", "_w_stop", "_loop", "is_log_in", "me", "_me_id",
+        "session_id", "_pong_a", "_pong_b", "handlers", "_cmd_handlers",
+        "_generic_handlers", "_opcode_handlers", "_chat_cache", "_pending",
+        "_pending_lock", "_device_id",
+    )
+
+    def __init__(self, token: str = None, phone: str = None):
+        """
+        Initializes a new instance of the MaxClient class.
+
+        This constructor sets up the client with optional authentication token and phone number.
+        It prepares internal state for sequence numbering, user agent generation, WebSocket connection,
+        and event handlers.
+
+        Usage:
+            ```
+            # You can use only token or only phone if have one.
+            client = MaxClient(token="token", phone="number")
+            # Now you can use client methods like connect(), auth(), etc.
+            ```
+        """
+
+        # print("Loaded WebMaxLib")
+
+        self._seq_iter = itertools.count(0)
+
+        self.phone_number = phone
+        self.auth_token = token
+        self._device_id = str(uuid4())
+        self.user_agent = self._generate_user_agent()
+
+        self.websocket = None
+    
+        self._19_payload = None
+        self._on_connect = None
+        self._connected = False
+        self._t = None
+        self._t_stop = False
+        self._send_q = queue.SimpleQueue()
+        self._w = None
+        self._w_stop = False
+        self._loop = None
+
+        self.is_log_in = False
+        self.me = None
+        self._me_id = None
+        self.session_id = int(time.time()*1000)
+
+        self._pong_a = '{"ver":11,"cmd":0,"seq":'
+        self._pong_b = ',"opcode":1,"payload":{"interactive":false}}'
+
+        self.handlers = []
+        self._cmd_handlers = {}
+        self._generic_handlers = []
+        self._opcode_handlers = {1: self._handle_ping, 128: self._handle_msg}
+        self._chat_cache = {}
+        self._pending = {}
+        self._pending_lock = threading.Lock()
+
+    # region seq
+    def seq(self) -> int:
+        # Plain method, not a property: next(count) is ~3x cheaper than the
+        # descriptor protocol, and a debugger inspecting the attribute no
+        # longer bumps the counter as a side effect.
+        return next(self._seq_iter)
+    
+    # region cid
+    @staticmethod
+    def cid() -> int:
+        return time.time_ns() // 1_000_000
+
+    # region marker
+    @staticmethod
+    def marker() -> int:
+        # 900-prefixed epoch seconds, same digits as the old
+        # int("900" + str(int(time.time()))) without the string round-trip.
+        return 9_000_000_000_000 + time.time_ns() // 1_000_000_000
+
+    # region _generate_user_agent()
+    def _generate_user_agent(self) -> str:
+        return _dumps({
+            "ver": 11,
+            "cmd": 0,
+            "seq": next(self._seq_iter),
+            "opcode": 6,
+            "payload": {
+                "userAgent": {
+                    "deviceType": "WEB",
+                    "locale": "ru",
+                    "osVersion": "Linux",
+                    "deviceName": "WebMax Lib",
+                    "headerUserAgent": "Mozilla/5.0 (X11; Ubuntu; Linux x86_64; rv:135.0) Gecko/20100101 Firefox/135.0",
+                    "deviceLocale": "ru",
+                    "appVersion": "4.8.42",
+                    "screen": "1080x1920 1.0x",
+                    "timezone": "Europe/Moscow"
+                },
+                "deviceId": self._device_id
+            }
+        })
+
+    # region connect()
+    def connect(self, _f=None):
+        """
+        Establishes a WebSocket connection to the server.
+
+        This method connects to the WebSocket endpoint, sends the user agent, and authenticates using the token.
+        It sets the client to connected state and retrieves the user profile.
+
+        Usage:
+            ```
+            # You can use only token or only phone if have one.
+            client = MaxClient(token="token", phone="number")
+            client.connect()
+            # Call this after setting the auth_token to establish the connection.
+            ```
+        """
+        if self._connected:
+            return
+        self.websocket = connect("wss://ws-api.oneme.ru/websocket", compression=None, max_size=2**22)
+        self.websocket.send(self.user_agent)
+        self.websocket.recv(decode=False)
+
+        if _f:
+            return
+
+        self._send_raw(_LOGIN_TPL % (next(self._seq_iter), _dumps(self.auth_token)))
+
+        p = self._recv()['payload']
+        usr = User(self, p['profile'])
+        self.me = usr
+        self._me_id = usr.contact.id
+        self._connected = True
+
+        if self._on_connect:
+            self._on_connect()
+
+    # region disconnect()
+    def disconnect(self):
+        """
+        Closes the WebSocket connection and resets the client state.
+
+        This method safely disconnects from the server and resets internal flags and sequence.
+
+        Usage:
+            ```
+            # You can use only token or only phone if have one.
+            client = MaxClient(token="token", phone="number")
+            client.disconnect()
+            # Call this to cleanly close the connection when done.
+            ```
+        """
+        if not self._connected:
+            return
+        if self.websocket:
+            self.websocket.close()
+            self._seq_iter = itertools.count(0)
+        self._connected = False
+        self.websocket = None
+        self._me_id = None
+
+    # region set_token()
+    def set_token(self, token):
+        """
+        Sets the authentication token for the client.
+
+        This updates the auth_token used for connecting to the server.
+
+        Usage:
+            ```
+            # You can use only token or only phone if have one.
+            client = MaxClient(token="token", phone="number")
+            client.set_token("new_auth_token")
+            # Use this to update the token before connecting or reconnecting.
+            ```
+        """
+        self.auth_token = token
+
+    # region _send()
+    def _send(self, opcode: int, payload: dict, seq: int = None) -> int:
+        """Internal frame sender. Don't touch.
+
+        Serializes only the variable part of the frame; the constant
+        `{"ver":11,"cmd":0,...}` header is spliced in as a template instead
+        of being re-encoded on every call.
+        """
+        if seq is None:
+            seq = next(self._seq_iter)
+        body = _dumps({"opcode": opcode, "payload": payload})
+        self._send_raw('{"ver":11,"cmd":0,"seq":%d,%s' % (seq, body[1:]))
+        return seq
+
+    # region _send_raw()
+    def _send_raw(self, frame: str):
+        """Internal pre-serialized frame sender. Don't touch."""
+        if self._loop is not None:
+            asyncio.run_coroutine_threadsafe(self.websocket.send(frame), self._loop)
+        elif self._w is not None and self._w.is_alive():
+            self._send_q.put(frame)
+        else:
+            self.websocket.send(frame)
+
+    # region _recv()
+    def _recv(self) -> dict:
+        """Internal frame reader. Don't touch.
+
+        Reads the frame as bytes (decode=False) so the UTF-8 validation
+        happens once, inside the JSON parser, instead of an extra
+        decode-to-str pass before it.
+        """
+        return _loads(self.websocket.recv(decode=False))
+
+    # region _register()
+    def _register(self) -> int:
+        """Internal request registration. Don't touch."""
+        seq = next(self._seq_iter)
+        with self._pending_lock:
+            self._pending[seq] = (threading.Event(), [])
+        return seq
+
+    # region _await()
+    def _await(self, seq: int, timeout: float = 30):
+        """Internal response wait. Don't touch."""
+        with self._pending_lock:
+            slot = self._pending.get(seq)
+
+        if self._loop is not None or (self._t and self._t.is_alive() and self._t is not threading.current_thread()):
+            # The listener only sets the event; the slot stays registered
+            # until this waiter pops it, so a response arriving before the
+            # wait starts can't orphan us.
+            ok = slot[0].wait(timeout)
+            with self._pending_lock:
+                self._pending.pop(seq, None)
+            if not ok:
+                raise TimeoutError(f"no response for seq {seq}")
+            return slot[1][0]
+
+        while True:
+            recv = self._recv()
+            with self._pending_lock:
+                pending = self._pending.pop(recv.get(_SEQ), None)
+            if pending is not None:
+                pending[1].append(recv)
+                pending[0].set()
+                if recv.get(_SEQ) == seq:
+                    return recv
+
+    # region _handle_ping()
+    def _handle_ping(self, recv, payload):
+        """Internal opcode-1 handler. Don't touch."""
+        # Only cmd:0 frames are server pings; the server also acks our pong
+        # with a cmd:1 opcode-1 frame, and answering that would ping-pong
+        # forever.
+        if recv.get(_CMD) != 0:
+            return
+        self._send_raw(self._pong_a + str(next(self._seq_iter)) + self._pong_b)
+
+    # region _handle_msg()
+    def _handle_msg(self, recv, payload):
+        """Internal opcode-128 handler. Don't touch."""
+        # print(recv)
+        msg = Message._new(self, payload[_CHAT_ID], **payload[_MESSAGE])
+        if self._loop is not None:
+            self._loop.run_in_executor(None, self._hlprocessor, msg)
+        else:
+            self._hlprocessor(msg)
+
+    # region _hlprocessor()
+    def _hlprocessor(self, msg: Message):
+        """Internal worker. Don't touch."""
+        text = msg.text
+        if text and text[0] == "/" and self._cmd_handlers:
+            func = self._cmd_handlers.get(text.split(None, 1)[0][1:].casefold())
+            if func is not None:
+                func(self, msg)
+                return
+        # Token miss (or non-command message): full first-match-wins scan.
+        # Command handlers are in this list too, so prefix matches like
+        # "/helloworld" against command("hello") still fire.
+        for filter, func in self._generic_handlers:
+            if filter(self, msg):
+                func(self, msg)
+                return  
+
+    # region _writer()
+    def _writer(self):
+        """Internal send-queue drain. Don't touch."""
+        q = self._send_q
+        while not self._w_stop:
+            frame = q.get()
+            frames = [frame]
+            while True:
+                try:
+                    frames.append(q.get_nowait())
+                except queue.Empty:
+                    break
+            # The protocol needs one WebSocket frame per JSON message, so a
+            # drained burst is sent frame by frame; batching still collapses
+            # N queue wake-ups into one drain pass. Frames that fail to send
+            # are retried rather than dropped: their _await callers are still
+            # blocked, and during a _reconnect window the socket is simply
+            # gone for a moment (websocket is None), which must not kill the
+            # writer for the life of the client.
+            i = 0
+            while i < len(frames) and not self._w_stop:
+                f = frames[i]
+                if f is None:
+                    # stop() sentinel; _w_stop is already set by then
+                    i += 1
+                    continue
+                ws = self.websocket
+                if ws is None:
+                    time.sleep(0.1)
+                    continue
+                try:
+                    ws.send(f)
+                except Exception:
+                    logger.warning("send failed, retrying frame", exc_info=True)
+                    time.sleep(0.1)
+                    continue
+                i += 1
+        self._w_stop = False
+
+    # region _reconnect()
+    def _reconnect(self) -> bool:
+        """Internal reconnect with bounded backoff. Don't touch."""
+        try:
+            if self.websocket:
+                self.websocket.close()
+        except Exception:
+            pass
+        self._connected = False
+        self.websocket = None
+        attempt = 0
+        while not self._t_stop:
+            try:
+                self.connect()
+                return True
+            except Exception:
+                delay = min(30, 2 ** attempt)
+                logger.warning("reconnect failed, retrying in %ss", delay, exc_info=True)
+                time.sleep(delay)
+                attempt += 1
+        return False
+
+    # region _listener()
+    def _listener(self):
+        """Internal listener. Don't touch."""
+        while not self._t_stop:
+            try:
+                recv = self._recv()
+            except ConnectionClosed:
+                if self._t_stop or not self._reconnect():
+                    break
+                continue
+            except ValueError:
+                # one malformed frame must not kill the listener
+                logger.warning("dropping malformed frame", exc_info=True)
+                continue
+            except Exception:
+                logger.exception("listener stopped: recv failed")
+                break
+
+            try:
+                with self._pending_lock:
+                    slot = self._pending.get(recv.get(_SEQ))
+                if slot is not None:
+                    slot[1].append(recv)
+                    slot[0].set()
+                    continue
+
+                handler = self._opcode_handlers.get(recv[_OPCODE])
+                if handler is not None:
+                    handler(recv, recv[_PAYLOAD])
+            except Exception:
+                # frames that parse but don't dispatch cleanly (missing keys,
+                # non-dict payloads, handler bugs) must not kill the listener
+                logger.exception("error handling frame: %s", recv)
+                continue
+
+            logger.debug("ws frame: %s", recv)
+        self._t_stop = False
+
+    # region _alistener()
+    async def _alistener(self):
+        """Internal asyncio listener. Don't touch."""
+        async for raw in self.websocket:
+            try:
+                recv = _loads(raw)
+            except ValueError:
+                # one malformed frame must not kill the listener
+                logger.warning("dropping malformed frame", exc_info=True)
+                continue
+
+            try:
+                with self._pending_lock:
+                    slot = self._pending.get(recv.get(_SEQ))
+                if slot is not None:
+                    slot[1].append(recv)
+                    slot[0].set()
+                    continue
+
+                handler = self._opcode_handlers.get(recv[_OPCODE])
+                if handler is not None:
+                    handler(recv, recv[_PAYLOAD])
+            except Exception:
+                logger.exception("error handling frame: %s", recv)
+                continue
+
+            logger.debug("ws frame: %s", recv)
+
+    # region arun()
+    async def arun(self):
+        """
+        Runs the client as a task on the current asyncio event loop.
+
+        This is the task-based alternative to run() for apps driving several
+        accounts from one process: each client becomes a listener task on a
+        shared loop instead of a dedicated OS thread per connection.
+        Handlers run in the default executor, so the same synchronous
+        handlers and request methods keep working — their outgoing frames
+        are marshalled back onto the loop.
+
+        Usage:
+            ```
+            clients = [MaxClient(token=t) for t in tokens]
+
+            async def main():
+                await asyncio.gather(*(c.arun() for c in clients))
+
+            asyncio.run(main())
+            ```
+        """
+        if self._connected:
+            return
+        self._loop = asyncio.get_running_loop()
+        self.websocket = await aconnect("wss://ws-api.oneme.ru/websocket", compression=None, max_size=2**22)
+        await self.websocket.send(self.user_agent)
+        await self.websocket.recv()
+
+        await self.websocket.send(_LOGIN_TPL % (next(self._seq_iter), _dumps(self.auth_token)))
+
+        p = _loads(await self.websocket.recv())['payload']
+        usr = User(self, p['profile'])
+        self.me = usr
+        self._me_id = usr.contact.id
+        self._connected = True
+
+        if self._on_connect:
+            self._on_connect()
+
+        try:
+            await self._alistener()
+        finally:
+            self._connected = False
+            self.websocket = None
+            self._me_id = None
+            self._loop = None
+
+    # region run()
+    def run(self):
+        """
+        Starts the client by connecting and launching the listener thread.
+
+        This connects to the server and begins listening for messages in a background thread.
+
+        Usage:
+            ```
+            # You can use only token or only phone if have one.
+            client = MaxClient(token="token", phone="number")
+            client.run()
+            ```
+        """
+        self.connect()
+        self._t = threading.Thread(target=self._listener, name="WebMaxListener")
+        self._t.start()
+        self._w = threading.Thread(target=self._writer, name="WebMaxWriter")
+        self._w.start()
+    
+    def stop(self):
+        """
+        Stops the listener thread and disconnects from the server.
+
+        This signals the listener to stop and closes the connection.
+
+        Usage:
+            ```
+            # You can use only token or only phone if have one.
+            client = MaxClient(token="token", phone="number")
+
+            @client.on_connect # Using onconnect decorator
+            def onconnect():
+                client.stop() # Stops client after run
+
+            client.run()
+            ```
+        """
+        self._t_stop = True
+        self._w_stop = True
+        self._send_q.put(None)
+        self.disconnect()
+
+    # region _start_auth()
+    def _start_auth(self, phone_number) -> dict:
+        """
+        Initiates the authentication process by sending a phone number to receive a verification code.
+
+        This sends a request to start authentication and returns the server response.
+
+        Usage:
+            ```
+            # You can use only token or only phone if have one.
+            client = MaxClient(token="token", phone="number")
+            response = client._start_auth("your_phone_number")
+            ```
+        """
+        self.connect(_f=1)
+        if self.is_log_in:
+            raise ValueError("Client is logged in now")
+        
+        self._send(17, {
+            "phone": phone_number,
+            "type": "START_AUTH",
+            "language": "ru"
+        })
+
+        return self._recv() # experimental
+    
+    # region _check_code()
+    def _check_code(self, token, code) -> dict:
+        self._send(18, {
+            "token": token,
+            "verifyCode": code,
+            "authTokenType": "CHECK_CODE"
+        })
+
+        token_resp = self._recv()
+        payload = token_resp['payload']
+        error = token_resp['payload'].get("error", None)
+
+        if error == "verify.code.wrong":
+            raise VerifyCodeWrong(payload["error"], payload["title"])
+        return token_resp
+
+    # region auth()
+    def auth(self, phone_number: str):
+        """
+        Performs the full authentication process interactively.
+
+        This connects, starts auth, prompts for the code, verifies it, and sets the auth_token.
+        Returns the User object for the authenticated user.
+
+        Usage:
+        ```
+        user = client.auth("+7xxxxxxxxxx")
+        # Follow the prompt to enter the SMS code.
+        ```
+        """
+
+        code_resp = self._start_auth(phone_number)
+
+        if code_resp.get('payload', {}).get('error'):
+            raise ValueError(code_resp['payload']['error'] + ": " + code_resp['payload']['localizedMessage'])
+            
+        token = code_resp['payload']['token']
+        print(f"Auth token received. Please enter the code sent to your phone.\n")
+
+        while True:
+            try:
+                code = input("Auth code: ")
+                token_resp = self._check_code(token, code)
+
+                payload = token_resp['payload']
+                break
+
+            except VerifyCodeWrong as vcw:
+                print(f"{vcw.title} ({vcw.error})")
+                continue
+
+            except Exception as e:
+                print(e)
+                continue
+
+        self.auth_token = payload['tokenAttrs']['LOGIN']['token']
+        usr = User(self, payload['profile'])
+        self.me = usr
+        self._me_id = usr.contact.id
+        return self.me
+
+    # region get_chats()
+    # DONT USE THIS! BROKEN
+    # def get_chats(self, count = 40) -> dict:
+    #     if not self.auth_token:
+    #         raise ValueError("No auth token provided. Please authenticate first.")
+
+    #     self.websocket.send(_dumps({
+    #         "ver": 11,
+    #         "cmd": 0,
+    #         "seq": self.seq,
+    #         "opcode": 19,
+    #         "payload": {
+    #             "interactive": True,
+    #             "token": self.auth_token,
+    #             "chatsSync": 0,
+    #             "contactsSync": 0,
+    #             "presenceSync": 0,
+    #             "draftsSync": 0,
+    #             "chatsCount": count
+    #         }
+    #     }))
+
+    #     response = _loads(self.websocket.recv())
+    #     return response
+
+    # region send_message()
+    def send_message(self, chat_id: int, text: str, reply_id: str|int = None, notify: bool = True):
+        """
+        Sends a text message to a specified chat.
+
+        This method constructs and sends a text message to the given chat ID, with an optional reply to another message.
+        It waits for the server response with the matching sequence number and returns a `Message` object.
+
+        Args:
+            chat_id (int): The ID of the chat to send the message to.
+            text (str): The text content of the message.
+            reply_id (str | int, optional): The ID of the message to reply to. Defaults to None.
+            notify (bool, optional): Whether to notify chat participants. Defaults to True.
+
+        Returns:
+            Message: A `Message` object representing the sent message.
+
+        Raises:
+            ValueError: If the client is not connected or authenticated.
+            Exception: If the server response cannot be parsed into a `Message` object.
+
+        Usage:
+            ```python
+            # Send a simple message
+            msg = client.send_message(12345678, "Hello, world!")
+            
+            # Send a message with a reply
+            msg = client.send_message(12345678, "Replying to you!", reply_id=987654)
+            ```
+        """
+        seq = self._register()
+        now_ms = time.time_ns() // 1_000_000
+        text_json = _dumps(text)
+        notify_json = "true" if notify else "false"
+        if reply_id:
+            frame = _SEND_TPL_REPLY % (seq, chat_id, text_json, now_ms, _dumps(str(reply_id)), notify_json)
+        else:
+            frame = _SEND_TPL % (seq, chat_id, text_json, now_ms, notify_json)
+        self._send_raw(frame)
+        recv = self._await(seq)
+        payload = recv["payload"]
+        try:
+            msg = Message(self, payload["chatId"], **payload["message"])
+        
+            return msg
+        except:
+            raise
+
+    # region delete_message()
+    def delete_message(self, chat_id: int, message_ids: list[str], for_me: bool = False):
+        """
+        Deletes one or more messages from a specified chat.
+
+        This method sends a request to delete messages identified by their IDs in the given chat.
+        The `for_me` parameter determines whether the deletion is only for the current user or for all chat participants.
+
+        Args:
+            chat_id (int): The ID of the chat containing the messages.
+            message_ids (list[str]): A list of message IDs to delete.
+            for_me (bool, optional): If True, deletes the messages only for the current user. Defaults to False.
+
+        Raises:
+            ValueError: If the client is not connected or authenticated.
+
+        Usage:
+            ```python
+            # Delete messages for all participants
+            client.delete_message(12345678, ["1000121", "1000122"])
+            
+            # Delete messages only for the current user
+            client.delete_message(12345678, ["1000120"], for_me=True)
+            ```
+        """
+        self._send(66, {
+            "chatId": chat_id,
+            "messageIds": message_ids,
+            "forMe": for_me
+        })
+
+    # region edit_message()
+    def edit_message(self, chat_id: int, message_id: str|int, text: str):
+        """
+        Edits the text of an existing message in a specified chat.
+
+        This method sends a request to update the text of a message identified by its ID in the given chat.
+        It waits for the server response with the matching sequence number and returns the updated `Message` object.
+
+        Args:
+            chat_id (int): The ID of the chat containing the message.
+            message_id (str | int): The ID of the message to edit.
+            text (str): The new text content for the message.
+
+        Returns:
+            Message: A `Message` object representing the edited message.
+
+        Raises:
+            ValueError: If the client is not connected, not authenticated, or the response cannot be parsed.
+
+        Usage:
+            ```python
+            # Edit an existing message
+            updated_msg = client.edit_message(12345678, "12111121", "New text")
+            ```
+        """
+        seq = self._register()
+        self._send_raw(_EDIT_TPL % (seq, chat_id, _dumps(str(message_id)), _dumps(text)))
+        recv = self._await(seq)
+        payload = recv["payload"]
+        msg = Message(self, chat_id, **payload["message"])
+        
+        return msg
+    
+    # region pin_chat()
+    def pin_chat(self, chat_id: int|str):
+        now_ms = time.time_ns() // 1_000_000
+        self._send(22, {
+            "settings": {
+                "chats": {
+                    str(chat_id): {
+                        "favIndex": now_ms
+                    }
+                }
+            }
+        })
+        return True
+
+    # region unpin_chat()
+    def unpin_chat(self, chat_id: int|str):
+        self._send(22, {
+            "settings": {
+                "chats": {
+                    str(chat_id): {
+                        "favIndex": 0
+                    }
+                }
+            }
+        })
+        return True
+    
+    # region get_user()
+    def get_user(self, **kwargs):
+        """
+        Retrieves a user's profile by their ID or phone number.
+
+        Args:
+            - id (int, optional) : The contact ID of the user to retrieve.
+            - phone (str, optional) : The phone number of the user to retrieve.
+            - chat_id (int, optional) : The chat ID with the user to retrieve.
+
+        Returns:
+            User: A `User` object representing the retrieved user's profile.
+
+        Raises:
+            ValueError: If neither `id` nor `phone` is provided, or if the client is not connected or authenticated.
+            WebSocketError: If there is an issue with the WebSocket communication.
+
+        Usage:
+            ```python
+            # Get user by ID
+            user = client.get_user(id="123456")
+            print(user.contact.names[0].name)  # Prints the user's full name
+
+            # Get user by phone number
+            user = client.get_user(phone="+7xxxxxxxxxx")
+            print(user.contact.phone)  # Prints the user's phone number
+        """
+        id = kwargs.get('id')
+        phone = kwargs.get('phone')
+        chat_id = kwargs.get('chat_id')
+        _f = kwargs.get("_f")
+
+        if not id and chat_id:
+            id = self.me.contact.id ^ chat_id
+        if id:
+            return self.get_users([id], _f)[0]
+        if not phone:
+            raise ValueError("no `id` or `phone` or `chat_id` provided")
+
+        seq = self._register()
+        self._send(46, {"phone": str(phone)}, seq)
+        payload = self._await(seq)["payload"]
+
+        error = payload.get("error")
+
+        if error:
+            raise UserNotFound(error, payload["message"]+f": {phone}")
+
+        payload["contact"]["phone"] = phone
+        return User(self, payload["contact"], _f)
+
+    # region get_users()
+    def get_users(self, ids: list[int], _f=0) -> list:
+        """
+        Retrieves several user profiles in a single request.
+
+        This sends one opcode-32 frame with all contact IDs instead of one
+        round-trip per user.
+
+        Args:
+            ids (list[int]): The contact IDs of the users to retrieve.
+
+        Returns:
+            list[User]: `User` objects in the order returned by the server.
+
+        Usage:
+            ```python
+            users = client.get_users([123456, 654321])
+            ```
+        """
+        seq = self._register()
+        self._send(32, {"contactIds": list(ids)}, seq)
+        recv = self._await(seq)
+        payload = recv["payload"]
+
+        error = payload.get("error")
+
+        if error:
+            raise UserNotFound(error, payload["message"])
+
+        return [User(self, contact, _f) for contact in payload["contacts"]]
+
+    # region session_exit()
+    def session_exit(self):
+        """Terminates active session token. **There no way back.**"""
+        self._send_raw('{"ver":11,"cmd":0,"seq":%d,"opcode":20,"payload":{}}' % next(self._seq_iter))
+        self.disconnect()
+        return True
+    
+    # region set_reaction()
+    def set_reaction(self, chat_id, message_id, reaction: EMOJIS):
+        """
+        Sets a reaction to a specific message in a chat.
+
+        This function sends a reaction to a message and return a Reactions object.
+
+        Args:
+            chat_id (str): The unique identifier of the chat.
+            message_id (str): The unique identifier of the message.
+            reaction (EMOJIS): The emoji reaction to be set, using the EMOJIS enumeration.
+
+        Returns:
+            Reactions: An object containing information about the updated message reactions,
+                    including counters for each emoji, your own reaction, and the total count.
+        """
+        seq = self._register()
+        self._send(178, {"chatId": chat_id, "messageId": message_id, "reaction": {"reactionType": "EMOJI", "id": reaction}}, seq)
+        recv = self._await(seq)
+        payload = recv["payload"] # {"ver":11,"cmd":1,"seq":79,"opcode":178,"payload":{"reactionInfo":{"counters":[{"count":1,"reaction":"â¤ï¸"}],"yourReaction":"â¤ï¸","totalCount":1}}}
+        
+        return Reactions(**payload)
+    
+    # region contact_add()
+    def contact_add(self, user_id: int):
+        seq = self._register()
+        self._send(34, {"contactId": user_id, "action": "ADD"}, seq)
+        payload = self._await(seq)["payload"]
+
+        return User(self, payload["contact"])
+    
+    # region contact_remove()
+    def contact_remove(self, user_id: int):
+        seq = self._register()
+        self._send(34, {"contactId": user_id, "action": "REMOVE"}, seq)
+        self._await(seq)
+        return True
+    
+    # region contact_block()
+    def contact_block(self, user_id: int):
+        seq = self._register()
+        self._send(34, {"contactId": user_id, "action": "BLOCK"}, seq)
+        self._await(seq)
+        return True
+    
+    # region contact_unblock()
+    def contact_unblock(self, user_id: int):
+        seq = self._register()
+        self._send(34, {"contactId": user_id, "action": "UNBLOCK"}, seq)
+        self._await(seq)
+        return True
+                
+    # region @on_message()
+    def on_message(self, filters):
+        """
+        Decorator to register a handler for a specific message type.
+
+        This allows defining functions to handle certain events or messages by text key.
+
+        Usage:
+        ```
+        from max import MaxClient as Client
+        from filters import filters
+        from classes import Message
+
+        client = Client("token")
+
+        @client.on_message(filters.command("hello"))
+        def command_hello(client: Client, message: Message):
+            message.reply("Max - самый забагованный мессенджер.")
+        # The decorated function will be called when the filter event occurs.
+
+        client.run()
+        ```
+        """
+        def decorator(func):
+            self.handlers.append((filters, func))
+            token = getattr(filters, "command_token", None)
+            # The token shortcut must give the same answer as the ordered
+            # scan, so it is only taken for commands where no earlier handler
+            # could win: every earlier handler must itself be a command whose
+            # command string is not a prefix of this one. First registration
+            # of a token wins, like the scan would.
+            if (token is not None
+                    and all(getattr(f, "command_token", None) is not None
+                            for f, _ in self._generic_handlers)
+                    and not any(token.startswith(tok) for tok in self._cmd_handlers)):
+                self._cmd_handlers.setdefault(token, func)
+            self._generic_handlers.append((filters, func))
+            return func
+
+        return decorator
+    
+    #region @on_connect
+    def on_connect(self, func):
+        """
+        Registers a callback function to be called upon successful connection.
+
+        This sets a handler that is invoked after connecting and authenticating.
+
+        Usage:
+        ```
+        from max import MaxClient as Client
+
+        client = Client("token")
+
+        @client.on_connect
+        def on_connect_handler():
+            print("Connected!")
+        # The function will be called automatically on connect.
+        client.run()
+        ```
+        """
+        self._on_connect = func
         return func
\ No newline at end of file